@@ -0,0 +1,149 @@
+"""
+Multi-channel batch runner.
+Fetches the union of every channel's feeds once, deduplicates globally, then
+renders each channel on a shared worker pool. All channels share one
+NewsFetcher (feed cache), the TTS cache and the anchor asset cache.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+import json
+
+from src.news_fetcher import NewsFetcher, DEFAULT_FEEDS, select_copy
+from main import NewsVideoGenerator
+
+DEFAULT_CONFIG = "channels.json"
+
+def load_channels(config_path=DEFAULT_CONFIG):
+    """
+    Load a channel config file.
+    Channels may list "sources" by name (looked up in the top-level "feeds"
+    catalogue) or give their own "feeds" mapping; both are merged into the
+    shared catalogue.
+    """
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    feeds = dict(config.get("feeds") or DEFAULT_FEEDS)
+    channels = []
+    for channel in config.get("channels", []):
+        if "name" not in channel:
+            raise ValueError(f"Channel entry without a name in {config_path}")
+        channel = dict(channel)
+        feeds.update(channel.get("feeds", {}))
+        sources = list(channel.get("sources", [])) + list(channel.get("feeds", {}))
+        unknown = [s for s in sources if s not in feeds]
+        if unknown:
+            raise ValueError(f"Channel '{channel['name']}' uses unknown sources: {', '.join(unknown)}")
+        channel["sources"] = sources or list(feeds)
+        channels.append(channel)
+
+    if not channels:
+        raise ValueError(f"No channels defined in {config_path}")
+
+    config["feeds"] = feeds
+    config["channels"] = channels
+    return config
+
+def channel_feeds(config):
+    """Return {name: url} for the feeds used by at least one channel of a loaded config."""
+    used = set()
+    for channel in config["channels"]:
+        used.update(channel["sources"])
+    return {name: url for name, url in config["feeds"].items() if name in used}
+
+class ChannelRunner:
+    def __init__(self, config_path=DEFAULT_CONFIG, max_workers=None, profile=False, profile_memory=False):
+        self.config = load_channels(config_path)
+        self.max_workers = max_workers or self.config.get("max_workers", 2)
+        self.output_root = self.config.get("output_dir", "output/channels")
+
+        # Only feeds used by at least one channel are fetched
+        feeds = channel_feeds(self.config)
+        self.news_fetcher = NewsFetcher(feeds=feeds)
+        self.used_sources = set(feeds)
+
+        # With "story_store" set, candidates come from the ingestor's database
+        self.story_store = None
+        if self.config.get("story_store"):
+            from src.story_store import StoryStore
+            self.story_store = StoryStore(self.config["story_store"])
+
+        self.generators = {}
+        for channel in self.config["channels"]:
+            self.generators[channel["name"]] = NewsVideoGenerator(
+                anchor_image=channel.get("anchor_image", "assets/anchor.png"),
+                voice=channel.get("voice", "en-IN-NeerjaNeural"),
+                output_dir=os.path.join(self.output_root, channel["name"]),
+                news_fetcher=self.news_fetcher,
+                sources=channel["sources"],
+                engine=channel.get("engine", "moviepy"),
+                subtitle_mode=channel.get("subtitle_mode", "burn"),
+                output_format=channel.get("output_format", "mp4"),
+                vfr=channel.get("vfr", False),
+                story_store=self.story_store,
+                profile=profile or self.config.get("profile", False),
+                profile_memory=profile_memory or self.config.get("profile_memory", False)
+            )
+
+    def run_channel(self, channel, news_items):
+        """Render every configured format for one channel, in order."""
+        generator = self.generators[channel["name"]]
+        # A story carried by several feeds belongs to every channel using one
+        # of them, read from that channel's own feed's copy
+        items = []
+        for item in news_items:
+            item = select_copy(item, channel["sources"])
+            if item is not None:
+                items.append(item)
+        results = {}
+        formats = channel.get("formats", ["landscape", "portrait"])
+
+        if "landscape" in formats:
+            results["landscape"] = generator.generate_news_video(
+                max_stories=channel.get("max_stories", 15), news_items=items
+            )
+        if "portrait" in formats:
+            results["portrait"] = generator.generate_short_video(
+                max_stories=channel.get("max_short_stories", 4), news_items=items
+            )
+        return results
+
+    def run_once(self):
+        """Fetch the union of all feeds once and render all channels."""
+        print(f"\n{'='*60}")
+        print(f"Starting multi-channel run - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"{'='*60}\n")
+
+        hours_back = self.config.get("hours_back", 6)
+        if self.story_store is not None:
+            news_items = self.story_store.recent(hours_back=hours_back, sources=self.used_sources)
+            print(f"[OK] Loaded {len(news_items)} stories from {self.story_store.db_path}")
+        else:
+            print(f"[INFO] Fetching {len(self.news_fetcher.feeds)} feeds for {len(self.generators)} channels...")
+            news_items = self.news_fetcher.fetch_news(hours_back=hours_back)
+            print(f"[OK] Fetched {len(news_items)} unique news items.")
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(self.run_channel, channel, news_items): channel["name"]
+                for channel in self.config["channels"]
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                    print(f"[OK] Channel {name} finished: {results[name]}")
+                except Exception as e:
+                    print(f"[ERROR] Channel {name} failed: {e}")
+                    results[name] = None
+        return results
+
+if __name__ == "__main__":
+    config_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CONFIG
+    ChannelRunner(config_path).run_once()
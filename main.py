@@ -10,18 +10,35 @@ import time
 from datetime import datetime
 import json
 import random
+import threading
 
 class NewsVideoGenerator:
-    def __init__(self):
-        self.news_fetcher = NewsFetcher()
+    def __init__(self, anchor_image="assets/anchor.png", voice="en-IN-NeerjaNeural",
+                 output_dir="output", news_fetcher=None, sources=None, engine="moviepy",
+                 subtitle_mode="burn", output_format="mp4", on_segment=None, vfr=False,
+                 story_store=None, profile=False, profile_memory=False):
+        # A shared NewsFetcher lets several channels reuse one feed cache;
+        # sources restricts this generator to a subset of the fetcher's feeds.
+        self.news_fetcher = news_fetcher or NewsFetcher()
+        self.sources = sources
+        # When set, candidates come from the local store the ingestor fills
+        self.story_store = story_store
         self.summarizer = Summarizer()
-        self.audio_gen = AudioGenerator()
-        self.video_gen = VideoGenerator()
-        self.anchor_image = "assets/anchor.png"  # Default anchor image path
-        self.history_file = "output/story_history.json"
+        self.audio_gen = AudioGenerator(output_dir=os.path.join(output_dir, "audio"), voice=voice)
+        self.video_gen = VideoGenerator(output_dir=os.path.join(output_dir, "videos"), engine=engine,
+                                        subtitle_mode=subtitle_mode, output_format=output_format,
+                                        on_segment=on_segment, vfr=vfr)
+        self.anchor_image = anchor_image
+        self.output_dir = output_dir
+        # With profile set, each stage of a run is profiled separately into
+        # <output_dir>/profiles/<timestamp>_<kind>/
+        self.profile = profile
+        self.profile_memory = profile_memory
+        self.history_file = os.path.join(output_dir, "story_history.json")
+        self._history_lock = threading.Lock()
         
         # Create history file if not exists
-        os.makedirs("output", exist_ok=True)
+        os.makedirs(output_dir, exist_ok=True)
         if not os.path.exists(self.history_file):
             with open(self.history_file, 'w') as f:
                 json.dump({"used_titles": []}, f)
@@ -38,33 +55,53 @@ class NewsVideoGenerator:
     def save_to_history(self, titles):
         """Save used story titles to history file."""
         try:
-            history = self.load_history()
-            history.update(titles)
-            
-            # Keep only last 100 titles to prevent file from growing too large
-            history_list = list(history)[-100:]
-            
-            with open(self.history_file, 'w') as f:
-                json.dump({"used_titles": history_list}, f, indent=2)
+            with self._history_lock:
+                history = self.load_history()
+                history.update(titles)
+                
+                # Keep only last 100 titles to prevent file from growing too large
+                history_list = list(history)[-100:]
+                
+                with open(self.history_file, 'w') as f:
+                    json.dump({"used_titles": history_list}, f, indent=2)
         except Exception as e:
             print(f"[WARN] Could not save history: {e}")
 
-    def generate_news_video(self, hours_back=6, max_stories=15):
+    def make_profiler(self, kind):
+        """Return a StageProfiler for one run, or a NullProfiler when profiling is off."""
+        from src.profiling import StageProfiler, NullProfiler
+        if not self.profile:
+            return NullProfiler()
+        run_dir = os.path.join(self.output_dir, "profiles",
+                               f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{kind}")
+        return StageProfiler(run_dir, memory=self.profile_memory)
+
+    def fetch_candidates(self, hours_back=6):
+        """Fetch recent news items from this generator's sources (from the story store if configured)."""
+        if self.story_store is not None:
+            return self.story_store.recent(hours_back=hours_back, sources=self.sources)
+        return self.news_fetcher.fetch_news(hours_back=hours_back, sources=self.sources)
+
+    def generate_news_video(self, hours_back=6, max_stories=15, news_items=None, shuffle=True):
         """
         Main pipeline:
-        1. Fetch latest news
+        1. Fetch latest news (skipped when news_items is given)
         2. Summarize into script
         3. Generate audio
         4. Create video
+        Pass shuffle=False when news_items is already ranked best first.
         """
         try:
             print(f"\n{'='*60}")
             print(f"Starting News Video Generation - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             print(f"{'='*60}\n")
+            profiler = self.make_profiler("news")
             
             # Step 1: Fetch News
-            print("[INFO] Fetching latest news...")
-            news_items = self.news_fetcher.fetch_news(hours_back=hours_back)
+            if news_items is None:
+                print("[INFO] Fetching latest news...")
+                with profiler.stage("fetch"):
+                    news_items = self.fetch_candidates(hours_back=hours_back)
             
             if not news_items:
                 print("[WARN] No news items found.")
@@ -81,23 +118,26 @@ class NewsVideoGenerator:
                 # Clear history if all stories have been used
                 with open(self.history_file, 'w') as f:
                     json.dump({"used_titles": []}, f)
-                fresh_news = news_items
+                fresh_news = list(news_items)
             
             print(f"[INFO] {len(fresh_news)} fresh stories available (filtered {len(news_items) - len(fresh_news)} used stories)")
             
             # Shuffle to get random stories each time
-            random.shuffle(fresh_news)
+            if shuffle:
+                random.shuffle(fresh_news)
             
             # Step 2: Create Script
             print("\n[INFO] Creating news script...")
-            script = self.summarizer.create_script(fresh_news, max_items=max_stories)
+            with profiler.stage("script"):
+                script = self.summarizer.create_script(fresh_news, max_items=max_stories)
             print(f"[OK] Script created ({len(script)} characters)")
             
             # Step 3: Generate Audio
             print("\n[INFO] Generating audio...")
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             audio_filename = f"news_{timestamp}.mp3"
-            audio_path, subtitle_path = self.audio_gen.generate_audio(script, audio_filename)
+            with profiler.stage("tts"):
+                audio_path, subtitle_path = self.audio_gen.generate_audio(script, audio_filename)
             print(f"[OK] Audio saved: {audio_path}")
             print(f"[OK] Subtitles saved: {subtitle_path}")
             
@@ -111,13 +151,14 @@ class NewsVideoGenerator:
                 print("   Skipping video generation for now.")
                 return audio_path
             
-            video_path = self.video_gen.create_video(
-                audio_path=audio_path,
-                anchor_image_path=self.anchor_image,
-                headline_text="Latest News",
-                output_filename=video_filename,
-                subtitle_path=subtitle_path
-            )
+            with profiler.stage("render"):
+                video_path = self.video_gen.create_video(
+                    audio_path=audio_path,
+                    anchor_image_path=self.anchor_image,
+                    headline_text="Latest News",
+                    output_filename=video_filename,
+                    subtitle_path=subtitle_path
+                )
             print(f"[OK] Video saved: {video_path}")
             
             # Save used stories to history
@@ -137,7 +178,7 @@ class NewsVideoGenerator:
                 description = template.replace("{HEADLINES_LIST}", headlines_list)
                 
                 desc_filename = video_filename.replace(".mp4", ".txt")
-                desc_path = os.path.join("output/videos", desc_filename)
+                desc_path = os.path.join(self.video_gen.output_dir, desc_filename)
                 
                 with open(desc_path, "w", encoding="utf-8") as f:
                     f.write(description)
@@ -157,19 +198,23 @@ class NewsVideoGenerator:
             traceback.print_exc()
             return None
     
-    def generate_short_video(self, hours_back=6, max_stories=4):
+    def generate_short_video(self, hours_back=6, max_stories=4, news_items=None, shuffle=True):
         """
         Generate a 50-second portrait video for YouTube Shorts/Instagram Reels.
         Uses fewer stories and shorter summaries than the main video.
+        Pass shuffle=False when news_items is already ranked best first.
         """
         try:
             print(f"\n{'='*60}")
             print(f"Starting Short Video Generation - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             print(f"{'='*60}\n")
+            profiler = self.make_profiler("short")
             
             # Step 1: Fetch News (reuse same logic)
-            print("[INFO] Fetching latest news for short...")
-            news_items = self.news_fetcher.fetch_news(hours_back=hours_back)
+            if news_items is None:
+                print("[INFO] Fetching latest news for short...")
+                with profiler.stage("fetch"):
+                    news_items = self.fetch_candidates(hours_back=hours_back)
             
             if not news_items:
                 print("[WARN] No news items found.")
@@ -182,20 +227,23 @@ class NewsVideoGenerator:
             fresh_news = [item for item in news_items if item['title'] not in used_titles]
             
             if not fresh_news:
-                fresh_news = news_items
+                fresh_news = list(news_items)
             
-            random.shuffle(fresh_news)
+            if shuffle:
+                random.shuffle(fresh_news)
             
             # Step 2: Create SHORT Script
             print("\n[INFO] Creating short news script...")
-            script = self.summarizer.create_short_script(fresh_news, max_items=max_stories)
+            with profiler.stage("script"):
+                script = self.summarizer.create_short_script(fresh_news, max_items=max_stories)
             print(f"[OK] Short script created ({len(script)} characters)")
             
             # Step 3: Generate Audio
             print("\n[INFO] Generating audio...")
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             audio_filename = f"news_short_{timestamp}.mp3"
-            audio_path, subtitle_path = self.audio_gen.generate_audio(script, audio_filename)
+            with profiler.stage("tts"):
+                audio_path, subtitle_path = self.audio_gen.generate_audio(script, audio_filename)
             print(f"[OK] Audio saved: {audio_path}")
             print(f"[OK] Subtitles saved: {subtitle_path}")
             
@@ -208,15 +256,21 @@ class NewsVideoGenerator:
                 return audio_path
             
             # Use portrait video generator
-            portrait_gen = VideoGenerator(output_dir="output/videos", orientation="portrait")
-            
-            video_path = portrait_gen.create_video(
-                audio_path=audio_path,
-                anchor_image_path=self.anchor_image,
-                headline_text="Latest News",
-                output_filename=video_filename,
-                subtitle_path=subtitle_path
-            )
+            portrait_gen = VideoGenerator(output_dir=self.video_gen.output_dir, orientation="portrait",
+                                          engine=self.video_gen.engine,
+                                          subtitle_mode=self.video_gen.subtitle_mode,
+                                          output_format=self.video_gen.output_format,
+                                          on_segment=self.video_gen.on_segment,
+                                          vfr=self.video_gen.vfr)
+            
+            with profiler.stage("render"):
+                video_path = portrait_gen.create_video(
+                    audio_path=audio_path,
+                    anchor_image_path=self.anchor_image,
+                    headline_text="Latest News",
+                    output_filename=video_filename,
+                    subtitle_path=subtitle_path
+                )
             print(f"[OK] Short video saved: {video_path}")
             
             # Save to history
@@ -236,36 +290,310 @@ class NewsVideoGenerator:
             traceback.print_exc()
             return None
 
-    def run_continuous(self, interval_minutes=60):
+    def run_continuous(self, interval_minutes=60, check_minutes=5, min_fresh=5, hours_back=6):
         """
         Run the generator in a loop for 24/7 operation.
+        Candidates are checked every check_minutes; both formats are rendered
+        once min_fresh high-ranked fresh stories are waiting, or after
+        interval_minutes if anything fresh is waiting at all. Candidates are
+        stories from the last hours_back hours.
         """
+        from src.scheduler import RenderScheduler
         print("Starting 24/7 News Video Generator...")
-        print(f"Update interval: {interval_minutes} minutes\n")
-        
-        while True:
-            try:
-                # Generate both landscape and portrait videos
-                self.generate_news_video()
-                self.generate_short_video()
-                
-                print(f"\nSleeping for {interval_minutes} minutes...")
-                time.sleep(interval_minutes * 60)
-            except KeyboardInterrupt:
-                print("\n\nStopped by user.")
-                break
-            except Exception as e:
-                print(f"[ERROR] Error in continuous loop: {e}")
-                print("Waiting 5 minutes before retry...")
-                time.sleep(300)
+        RenderScheduler(self, deadline_minutes=interval_minutes, check_minutes=check_minutes,
+                        min_fresh=min_fresh, hours_back=hours_back).run_forever()
 
-if __name__ == "__main__":
-    generator = NewsVideoGenerator()
-    
-    # For testing, run once - generates both formats
-    print("Running single generation test (both formats)...")
-    generator.generate_news_video(hours_back=24, max_stories=15)
-    generator.generate_short_video(hours_back=24, max_stories=4)
+# Subcommands that run exactly one pipeline stage
+SINGLE_STAGE_COMMANDS = ("fetch", "script", "tts", "render", "remux")
+
+def load_news_file(path):
+    """Load news items saved by `main.py fetch --output`."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def cmd_fetch(args):
+    fetcher = NewsFetcher()
+    news_items = fetcher.fetch_news(hours_back=args.hours_back, sources=args.sources)
+    print(f"[OK] Fetched {len(news_items)} news items.")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(news_items, f, indent=2, ensure_ascii=False)
+        print(f"[OK] News items saved: {args.output}")
+    else:
+        for item in news_items:
+            print(f"[{item['source']}] {item['title']}")
+
+def cmd_script(args):
+    if args.input:
+        news_items = load_news_file(args.input)
+    elif args.store:
+        from src.story_store import StoryStore
+        news_items = StoryStore(args.store).recent(hours_back=args.hours_back)
+    else:
+        news_items = NewsFetcher().fetch_news(hours_back=args.hours_back)
+
+    summarizer = Summarizer()
+    if args.short:
+        script = summarizer.create_short_script(news_items, max_items=args.max_stories or 4)
+    else:
+        script = summarizer.create_script(news_items, max_items=args.max_stories or 15)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(script)
+        print(f"[OK] Script saved: {args.output} ({len(script)} characters)")
+    else:
+        print(script)
+
+def cmd_tts(args):
+    with open(args.script, "r", encoding="utf-8") as f:
+        script = f.read()
+    audio_gen = AudioGenerator(output_dir=args.output_dir, voice=args.voice, normalize=not args.raw)
+    audio_path, subtitle_path = audio_gen.generate_audio(script, args.output)
+    print(f"[OK] Audio saved: {audio_path}")
+    print(f"[OK] Subtitles saved: {subtitle_path}")
+
+def cmd_render(args):
+    video_gen = VideoGenerator(output_dir=args.output_dir, orientation=args.orientation,
+                               engine=args.engine, subtitle_mode=args.subtitle_mode,
+                               output_format=args.format, vfr=args.vfr)
+    output = args.output or os.path.splitext(os.path.basename(args.audio))[0] + ".mp4"
+    video_path = video_gen.create_video(
+        audio_path=args.audio,
+        anchor_image_path=args.anchor,
+        headline_text="Latest News",
+        output_filename=output,
+        subtitle_path=args.subtitles
+    )
+    print(f"[OK] Video saved: {video_path}")
+
+def cmd_remux(args):
+    from src.video_gen import mux_subtitles, srt_to_ass
+    subtitle_path = args.subtitles
+    if subtitle_path.lower().endswith(".srt") and args.width and args.height:
+        subtitle_path = srt_to_ass(subtitle_path, os.path.splitext(args.video)[0] + ".ass",
+                                   args.width, args.height)
+    output = mux_subtitles(args.video, subtitle_path, args.output)
+    print(f"[OK] Subtitles muxed: {output}")
+
+def cmd_ingest(args):
+    from src.ingestor import FeedIngestor
+    from src.story_store import StoryStore
+    news_fetcher = None
+    if args.config:
+        # Ingest every feed the channels use, including channel-defined ones
+        from channels import load_channels, channel_feeds
+        news_fetcher = NewsFetcher(feeds=channel_feeds(load_channels(args.config)))
+    ingestor = FeedIngestor(news_fetcher=news_fetcher, story_store=StoryStore(args.store),
+                            min_interval=args.min_interval, max_interval=args.max_interval)
+    if args.once:
+        # Force every feed due now
+        for source, url in ingestor.news_fetcher.feeds.items():
+            ingestor.poll(source, url)
+        return
+    ingestor.run_forever()
+
+def cmd_cycle(args):
+    story_store = None
+    if args.store:
+        from src.story_store import StoryStore
+        story_store = StoryStore(args.store)
+    generator = NewsVideoGenerator(anchor_image=args.anchor, voice=args.voice, engine=args.engine,
+                                   subtitle_mode=args.subtitle_mode, output_format=args.format,
+                                   vfr=args.vfr, story_store=story_store,
+                                   profile=args.profile, profile_memory=args.profile_memory)
+    if args.continuous:
+        generator.run_continuous(interval_minutes=args.interval, check_minutes=args.check_interval,
+                                 min_fresh=args.min_fresh, hours_back=args.hours_back)
+        return
+    # Run once - generates both formats
+    print("Running single generation (both formats)...")
+    generator.generate_news_video(hours_back=args.hours_back, max_stories=15)
+    generator.generate_short_video(hours_back=args.hours_back, max_stories=4)
+
+def cmd_channels(args):
+    from channels import ChannelRunner
+    ChannelRunner(args.config, max_workers=args.workers,
+                  profile=args.profile, profile_memory=args.profile_memory).run_once()
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output into (total_us, [(cumulative_us, module)]).
+    Only top-level imports (no leading indentation) count toward the total.
+    """
+    total = 0
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        cumulative_us = int(cumulative_us)
+        # Nested imports are indented by two spaces per level after the "| "
+        if not name[1:].startswith(" "):
+            total += cumulative_us
+            modules.append((cumulative_us, name.strip()))
+    return total, sorted(modules, reverse=True)
+
+def cmd_bench(args):
+    """Report interpreter + import startup cost of each subcommand."""
+    import subprocess
+
+    if args.render:
+        from src.video_gen import benchmark_engines
+        results = benchmark_engines(args.anchor, seconds=args.seconds, orientation=args.orientation)
+        print(f"{'engine':<10} {'fps':>8}")
+        for engine, fps in results.items():
+            print(f"{engine:<10} {fps:>8.1f}")
+        return
+
+    # Each subcommand is started for real and exits once its arguments are
+    # parsed (--help), which is the startup cost paid before it does any work.
+    # --run times one complete command line, including the imports its stage
+    # pulls in lazily.
+    subcommands = [c for c in build_parser().subcommands if c != "bench"]
+    if args.run:
+        runs = [(args.run[0], args.run)]
+    else:
+        unknown = [c for c in args.commands if c not in subcommands]
+        if unknown:
+            raise SystemExit(f"Unknown subcommands: {', '.join(unknown)}")
+        runs = [(command, [command, "--help"]) for command in args.commands or subcommands]
     
-    # Uncomment below to run continuously
-    # generator.run_continuous(interval_minutes=60)
+    print(f"{'command':<10} {'wall ms':>9} {'import ms':>10}  top imports")
+    for command, argv in runs:
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", os.path.abspath(__file__), *argv],
+            capture_output=True, text=True
+        )
+        wall_ms = (time.perf_counter() - started) * 1000
+        if result.returncode != 0:
+            print(f"{command:<10} failed: {result.stderr.strip().splitlines()[-1]}")
+            continue
+        total_us, modules = parse_importtime(result.stderr)
+        top = ", ".join(f"{name} {us / 1000:.0f}ms" for us, name in modules[:3])
+        print(f"{command:<10} {wall_ms:>9.0f} {total_us / 1000:>10.0f}  {top}")
+
+def build_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="24/7 news video generator")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile each stage into <output dir>/profiles/ (.pstats and .collapsed)")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="With --profile, also record the top tracemalloc allocation sites")
+    sub = parser.add_subparsers(dest="command")
+
+    p = sub.add_parser("fetch", help="Fetch news items")
+    p.add_argument("--hours-back", type=int, default=24)
+    p.add_argument("--sources", nargs="+", help="Only fetch these source names")
+    p.add_argument("--output", help="Save items as JSON instead of listing them")
+    p.set_defaults(func=cmd_fetch)
+
+    p = sub.add_parser("script", help="Build a news script")
+    p.add_argument("--input", help="News JSON from `fetch --output` (skips the network)")
+    p.add_argument("--store", help="Read candidates from this story store database (skips the network)")
+    p.add_argument("--hours-back", type=int, default=24)
+    p.add_argument("--max-stories", type=int)
+    p.add_argument("--short", action="store_true", help="Build the short-format script")
+    p.add_argument("--output", help="Write the script to this file")
+    p.set_defaults(func=cmd_script)
+
+    p = sub.add_parser("tts", help="Synthesize audio and subtitles from a script file")
+    p.add_argument("script")
+    p.add_argument("--voice", default="en-IN-NeerjaNeural")
+    p.add_argument("--output", default="news_audio.mp3")
+    p.add_argument("--output-dir", default="output/audio")
+    p.add_argument("--raw", action="store_true",
+                   help="Keep the raw TTS MP3 (skip loudness normalization and silence trimming)")
+    p.set_defaults(func=cmd_tts)
+
+    p = sub.add_parser("render", help="Render a video from audio and subtitles")
+    p.add_argument("--audio", required=True)
+    p.add_argument("--subtitles")
+    p.add_argument("--anchor", default="assets/anchor.png")
+    p.add_argument("--orientation", choices=["landscape", "portrait"], default="landscape")
+    p.add_argument("--engine", choices=["moviepy", "numpy"], default="moviepy")
+    p.add_argument("--subtitle-mode", choices=["burn", "ass", "soft"], default="burn")
+    p.add_argument("--format", choices=["mp4", "fmp4", "hls"], default="mp4",
+                   help="fmp4/hls write progressively so publishing can start mid-render")
+    p.add_argument("--vfr", action="store_true", help="Variable-frame-rate output: only changed frames are encoded")
+    p.add_argument("--output")
+    p.add_argument("--output-dir", default="output/videos")
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser("remux", help="Replace the soft subtitle track of a video without re-rendering")
+    p.add_argument("--video", required=True)
+    p.add_argument("--subtitles", required=True, help="Corrected .ass or .srt file")
+    p.add_argument("--width", type=int, help="With --height, convert an .srt to styled ASS first")
+    p.add_argument("--height", type=int)
+    p.add_argument("--output", help="Write here instead of replacing the video in place")
+    p.set_defaults(func=cmd_remux)
+
+    p = sub.add_parser("ingest", help="Poll feeds on adaptive schedules into the local story store")
+    p.add_argument("--store", default="output/stories.db")
+    p.add_argument("--config", help="Ingest the feeds used by the channels in this config (default: built-in feeds)")
+    p.add_argument("--min-interval", type=int, default=120, help="Fastest per-feed poll interval (seconds)")
+    p.add_argument("--max-interval", type=int, default=1800, help="Slowest per-feed poll interval (seconds)")
+    p.add_argument("--once", action="store_true", help="Poll every feed once and exit")
+    p.set_defaults(func=cmd_ingest)
+
+    p = sub.add_parser("cycle", help="Run the full pipeline for both formats")
+    p.add_argument("--hours-back", type=int, default=24)
+    p.add_argument("--anchor", default="assets/anchor.png")
+    p.add_argument("--voice", default="en-IN-NeerjaNeural")
+    p.add_argument("--engine", choices=["moviepy", "numpy"], default="moviepy")
+    p.add_argument("--subtitle-mode", choices=["burn", "ass", "soft"], default="burn")
+    p.add_argument("--format", choices=["mp4", "fmp4", "hls"], default="mp4")
+    p.add_argument("--vfr", action="store_true")
+    p.add_argument("--store", help="Read candidates from this story store (run `ingest` alongside)")
+    p.add_argument("--continuous", action="store_true", help="Keep running, rendering when fresh stories build up")
+    p.add_argument("--interval", type=int, default=60,
+                   help="With --continuous, render at least this often (minutes) while anything is fresh")
+    p.add_argument("--check-interval", type=int, default=5, help="Minutes between candidate checks")
+    p.add_argument("--min-fresh", type=int, default=5,
+                   help="Render as soon as this many fresh, high-ranked stories are waiting")
+    p.set_defaults(func=cmd_cycle)
+
+    p = sub.add_parser("channels", help="Run every channel in a config file once")
+    p.add_argument("config", nargs="?", default="channels.json")
+    p.add_argument("--workers", type=int)
+    p.set_defaults(func=cmd_channels)
+
+    p = sub.add_parser("bench", help="Measure startup time of each subcommand with -X importtime")
+    p.add_argument("commands", nargs="*", help="Subcommands to measure (default: all)")
+    p.add_argument("--run", nargs=argparse.REMAINDER, metavar="COMMAND",
+                   help="Time one full command line instead, e.g. --run render --audio news.m4a --engine numpy")
+    p.add_argument("--render", action="store_true", help="Benchmark render engine fps instead of startup")
+    p.add_argument("--seconds", type=int, default=10, help="Length of the --render benchmark clip")
+    p.add_argument("--anchor", default="assets/anchor.png")
+    p.add_argument("--orientation", choices=["landscape", "portrait"], default="landscape")
+    p.set_defaults(func=cmd_bench)
+
+    parser.subcommands = list(sub.choices)
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command is None:
+        # Bare `python main.py` keeps its old behaviour: one run of both formats
+        # (global options such as --profile still apply)
+        args = parser.parse_args([*(sys.argv[1:] if argv is None else argv), "cycle"])
+
+    if args.profile and args.command in SINGLE_STAGE_COMMANDS:
+        # A single-stage command is profiled as one stage; cycle and channels
+        # profile each stage of every run themselves
+        from src.profiling import StageProfiler
+        output_dir = getattr(args, "output_dir", None) or "output"
+        run_dir = os.path.join(output_dir, "profiles",
+                               f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{args.command}")
+        with StageProfiler(run_dir, memory=args.profile_memory).stage(args.command):
+            args.func(args)
+        return
+
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,47 @@
-import asyncio
-import edge_tts
-from gtts import gTTS
 import os
+import hashlib
+import shutil
+
+def _srt_timestamp(seconds):
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+def _parse_silences(stderr, duration):
+    """Collect (start, end) pairs from ffmpeg silencedetect output."""
+    import re
+    
+    silences = []
+    start = None
+    for line in stderr.splitlines():
+        match = re.search(r"silence_start: (-?[\d.]+)", line)
+        if match:
+            start = max(0.0, float(match.group(1)))
+            continue
+        match = re.search(r"silence_end: ([\d.]+)", line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    if start is not None:
+        # Silence running into the end of the file
+        silences.append((start, duration))
+    return silences
+
+def _parse_loudnorm(stderr):
+    """Return the JSON stats printed by loudnorm's measurement pass."""
+    import json
+    import re
+    
+    blocks = re.findall(r"\{[^{}]*\}", stderr)
+    if not blocks:
+        raise RuntimeError("loudnorm did not report measurements")
+    return json.loads(blocks[-1])
 
 class AudioGenerator:
-    def __init__(self, output_dir="output/audio", voice="en-US-AriaNeural"):
+    def __init__(self, output_dir="output/audio", voice="en-IN-NeerjaNeural", cache_dir="output/cache/tts",
+                 normalize=True, target_lufs=-16.0, max_gap=0.5):
         self.output_dir = output_dir
         os.makedirs(self.output_dir, exist_ok=True)
         
@@ -13,7 +50,48 @@ class AudioGenerator:
         # Male Indian English: en-IN-PrabhatNeural
         # Female US English: en-US-AriaNeural
         # Male US English: en-US-GuyNeural
-        self.voice = "en-IN-NeerjaNeural"  # Female Indian English
+        self.voice = voice
+
+        # Edge-TTS results are cached by (voice, text) so identical scripts
+        # across channels or reruns skip the network synthesis entirely.
+        self.cache_dir = cache_dir
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Post-processing applied once to the TTS output (see finalize_audio)
+        self.normalize = normalize
+        self.target_lufs = target_lufs
+        self.max_gap = max_gap
+
+    def _cache_paths(self, text):
+        """Return the cached (audio, subtitle) paths for text in the current voice."""
+        key = hashlib.sha1(f"{self.voice}\n{text}".encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + ".mp3", base + ".srt"
+
+    def _load_from_cache(self, text, filename):
+        """Copy a cached synthesis to the output dir; returns None on a miss."""
+        if not self.cache_dir:
+            return None
+        cached_audio, cached_subs = self._cache_paths(text)
+        if not (os.path.exists(cached_audio) and os.path.exists(cached_subs)):
+            return None
+        filepath = os.path.join(self.output_dir, filename)
+        sub_filepath = os.path.join(self.output_dir, os.path.splitext(filename)[0] + ".srt")
+        shutil.copyfile(cached_audio, filepath)
+        shutil.copyfile(cached_subs, sub_filepath)
+        print("[INFO] Reusing cached TTS audio")
+        return filepath, sub_filepath
+
+    def _store_in_cache(self, text, filepath, sub_filepath):
+        if not self.cache_dir:
+            return
+        cached_audio, cached_subs = self._cache_paths(text)
+        # Write via temp names so a concurrent reader never sees a partial file
+        for src, dst in ((filepath, cached_audio), (sub_filepath, cached_subs)):
+            tmp = f"{dst}.{os.getpid()}.{id(self)}.tmp"
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, dst)
 
     async def generate_audio_async(self, text, filename):
         """Generate audio file and subtitles from text using edge-tts."""
@@ -21,6 +99,7 @@ class AudioGenerator:
         sub_filename = os.path.splitext(filename)[0] + ".srt"
         sub_filepath = os.path.join(self.output_dir, sub_filename)
         
+        import edge_tts
         communicate = edge_tts.Communicate(text, self.voice)
         submaker = edge_tts.SubMaker()
         
@@ -44,6 +123,7 @@ class AudioGenerator:
         sub_filepath = os.path.join(self.output_dir, sub_filename)
         
         print("[INFO] Using Google TTS as fallback...")
+        from gtts import gTTS
         
         # Generate audio with gTTS
         tts = gTTS(text=text, lang='en', slow=False)
@@ -67,10 +147,130 @@ class AudioGenerator:
         return filepath, sub_filepath
 
     def generate_audio(self, text, filename="news_audio.mp3"):
-        """Synchronous wrapper for audio generation with automatic fallback."""
+        """
+        Synchronous wrapper for audio generation with automatic fallback.
+        With normalize enabled the returned audio is the finalized AAC track
+        (see finalize_audio) and the subtitles are retimed to match it.
+        """
+        filepath, sub_filepath = self._synthesize(text, filename)
+        if self.normalize:
+            try:
+                return self.finalize_audio(filepath, sub_filepath)
+            except Exception as e:
+                print(f"[WARN] Audio finalization failed ({e}), using raw TTS output")
+        return filepath, sub_filepath
+
+    def finalize_audio(self, audio_path, subtitle_path=None):
+        """
+        Decode the TTS output once and produce the single AAC track every
+        video variant stream-copies:
+        1. decode the MP3 to PCM (the only lossy decode)
+        2. measure EBU R128 loudness and find silences in one analysis pass
+        3. shorten silences longer than max_gap and retime the subtitles
+        4. apply linear loudnorm to target_lufs and encode AAC once
+        Returns (m4a_path, subtitle_path).
+        """
+        import subprocess
+        import wave
+        from src.video_gen import ffmpeg_exe
+        
+        ffmpeg = ffmpeg_exe()
+        root = os.path.splitext(audio_path)[0]
+        decoded_path = root + ".decoded.wav"
+        trimmed_path = root + ".trimmed.wav"
+        output_path = root + ".m4a"
+        
+        try:
+            subprocess.run([ffmpeg, "-y", "-loglevel", "error", "-i", audio_path,
+                            "-ac", "1", "-ar", "48000", "-c:a", "pcm_s16le", decoded_path], check=True)
+            
+            with wave.open(decoded_path, "rb") as src:
+                params = src.getparams()
+                pcm = src.readframes(params.nframes)
+            rate = params.framerate
+            frame_bytes = params.sampwidth * params.nchannels
+            duration = params.nframes / rate
+            
+            target = f"I={self.target_lufs}:TP=-1.5:LRA=11"
+            analysis = subprocess.run([
+                ffmpeg, "-hide_banner", "-nostats", "-i", decoded_path,
+                "-af", f"silencedetect=noise=-45dB:d={self.max_gap},loudnorm={target}:print_format=json",
+                "-f", "null", "-",
+            ], capture_output=True, text=True, check=True)
+            stats = _parse_loudnorm(analysis.stderr)
+            
+            # Keep max_gap/2 of silence on each side of speech, drop the rest
+            keep_edge = self.max_gap / 2
+            cuts = []
+            for start, end in _parse_silences(analysis.stderr, duration):
+                cut_start = start + keep_edge if start > 0 else 0.0
+                cut_end = end - keep_edge if end < duration else duration
+                if cut_end - cut_start > 0.01:
+                    cuts.append((cut_start, cut_end))
+            
+            with wave.open(trimmed_path, "wb") as dst:
+                dst.setparams(params)
+                position = 0
+                for cut_start, cut_end in cuts:
+                    dst.writeframes(pcm[position * frame_bytes:int(cut_start * rate) * frame_bytes])
+                    position = int(cut_end * rate)
+                dst.writeframes(pcm[position * frame_bytes:])
+            removed = sum(end - start for start, end in cuts)
+            
+            measured = (f"measured_I={stats['input_i']}:measured_TP={stats['input_tp']}:"
+                        f"measured_LRA={stats['input_lra']}:measured_thresh={stats['input_thresh']}:"
+                        f"offset={stats['target_offset']}:linear=true")
+            subprocess.run([
+                ffmpeg, "-y", "-loglevel", "error", "-i", trimmed_path,
+                "-af", f"loudnorm={target}:{measured}", "-ar", "48000",
+                "-c:a", "aac", "-b:a", "160k", output_path,
+            ], check=True)
+        finally:
+            for path in (decoded_path, trimmed_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        
+        print(f"[OK] Audio finalized: {stats['input_i']} -> {self.target_lufs} LUFS, "
+              f"trimmed {removed:.1f}s of silence")
+        
+        if subtitle_path and cuts:
+            self._retime_subtitles(subtitle_path, cuts)
+        return output_path, subtitle_path
+
+    def _retime_subtitles(self, subtitle_path, cuts):
+        """Shift SRT cues to account for the silence removed by finalize_audio."""
+        from src.video_gen import parse_srt
+        
+        def remap(t):
+            shift = 0.0
+            for cut_start, cut_end in cuts:
+                if t >= cut_end:
+                    shift += cut_end - cut_start
+                elif t > cut_start:
+                    # Inside a removed span: snap to where the cut now is
+                    shift += t - cut_start
+                else:
+                    break
+            return t - shift
+        
+        subtitles = parse_srt(subtitle_path)
+        with open(subtitle_path, "w", encoding="utf-8") as f:
+            for index, ((start, end), text) in enumerate(subtitles, 1):
+                f.write(f"{index}\n{_srt_timestamp(remap(start))} --> {_srt_timestamp(remap(end))}\n{text}\n\n")
+
+    def _synthesize(self, text, filename):
+        cached = self._load_from_cache(text, filename)
+        if cached:
+            return cached
+
+        import asyncio
+        import edge_tts
+
         try:
             # Try edge-tts first
-            return asyncio.run(self.generate_audio_async(text, filename))
+            filepath, sub_filepath = asyncio.run(self.generate_audio_async(text, filename))
+            self._store_in_cache(text, filepath, sub_filepath)
+            return filepath, sub_filepath
         except edge_tts.exceptions.NoAudioReceived:
             print("[WARN] Edge-TTS failed (NoAudioReceived), falling back to Google TTS...")
             return self.generate_audio_gtts(text, filename)
@@ -0,0 +1,87 @@
+"""
+Background feed ingestor.
+Polls every feed of a NewsFetcher on its own adaptive schedule and writes
+new items into a StoryStore, so generation reads candidates locally with
+no network round-trips on the critical path.
+"""
+
+import time
+
+from src.news_fetcher import NewsFetcher
+from src.story_store import StoryStore
+
+class FeedIngestor:
+    def __init__(self, news_fetcher=None, story_store=None, min_interval=120, max_interval=1800,
+                 retention_days=7):
+        self.news_fetcher = news_fetcher or NewsFetcher()
+        self.story_store = story_store or StoryStore()
+
+        # A feed that produced new items is polled twice as often (down to
+        # min_interval); a quiet feed backs off by 1.5x (up to max_interval)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.retention_days = retention_days
+        self._last_prune = 0.0
+
+    def _state(self, url):
+        state = self.story_store.get_feed_state(url)
+        if state is None:
+            state = {"etag": None, "modified": None, "interval": self.min_interval, "next_poll": 0.0}
+        return state
+
+    def poll(self, source, url):
+        """Poll one feed now, store its new items and reschedule it. Returns the number added."""
+        state = self._state(url)
+        added = 0
+        try:
+            items, etag, modified = self.news_fetcher.poll_feed(
+                source, url, etag=state["etag"], modified=state["modified"])
+            added = self.story_store.add_items(items)
+            if added:
+                interval = max(self.min_interval, state["interval"] / 2)
+            else:
+                interval = min(self.max_interval, state["interval"] * 1.5)
+            state["etag"], state["modified"] = etag, modified
+        except Exception as e:
+            print(f"[WARN] Ingest of {source} failed: {e}")
+            interval = min(self.max_interval, state["interval"] * 2)
+
+        self.story_store.save_feed_state(url, state["etag"], state["modified"],
+                                         interval, time.time() + interval)
+        print(f"[INFO] {source}: {added} new, next poll in {interval / 60:.1f} min")
+        return added
+
+    def run_once(self):
+        """
+        Poll every feed that is due. Returns (new items stored, seconds until
+        the next feed is due).
+        """
+        now = time.time()
+        added = 0
+        next_due = now + self.max_interval
+        for source, url in self.news_fetcher.feeds.items():
+            state = self._state(url)
+            if state["next_poll"] <= now:
+                added += self.poll(source, url)
+                state = self._state(url)
+            next_due = min(next_due, state["next_poll"])
+
+        if now - self._last_prune > 3600:
+            self.story_store.prune(days=self.retention_days)
+            self._last_prune = now
+        return added, max(0.0, next_due - time.time())
+
+    def run_forever(self):
+        """Poll feeds as they come due until interrupted."""
+        print(f"Starting feed ingestor for {len(self.news_fetcher.feeds)} feeds "
+              f"-> {self.story_store.db_path}")
+        while True:
+            try:
+                _, wait = self.run_once()
+                time.sleep(max(1.0, wait))
+            except KeyboardInterrupt:
+                print("\n\nIngestor stopped by user.")
+                break
+
+if __name__ == "__main__":
+    FeedIngestor().run_forever()
@@ -1,54 +1,137 @@
-import feedparser
 import time
 from datetime import datetime, timedelta
 import re
+import hashlib
+import threading
+
+DEFAULT_FEEDS = {
+    "Times of India": "https://timesofindia.indiatimes.com/rssfeedstopstories.cms",
+    "NDTV": "https://feeds.feedburner.com/ndtvnews-top-stories",
+    "The Hindu": "https://www.thehindu.com/news/national/feeder/default.rss",
+    "Indian Express": "https://indianexpress.com/feed/",
+    "BBC World": "http://feeds.bbci.co.uk/news/world/rss.xml",
+    "CNN World": "http://rss.cnn.com/rss/edition_world.rss",
+    "Al Jazeera": "https://www.aljazeera.com/xml/rss/all.xml",
+    # Add more as needed
+}
+
+def story_key(title):
+    """Dedup key: the title lowercased with punctuation and extra spaces removed."""
+    normalized = re.sub(r"[^\w\s]", "", title.lower())
+    normalized = " ".join(normalized.split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+# Fields each feed reports in its own words for a shared story
+COPY_FIELDS = ("title", "summary", "link", "published")
+
+def select_copy(item, sources):
+    """
+    Return item as carried by the first of its feeds that is in sources,
+    with that feed's own title, summary and link, or None when none of
+    sources carried it. Without a copy from that feed the item keeps its
+    original source, so text is never credited to another outlet.
+    """
+    for source in item.get("sources", [item["source"]]):
+        if source in sources:
+            copy = item.get("copies", {}).get(source)
+            if copy is None:
+                return dict(item)
+            return dict(item, source=source, **copy)
+    return None
 
 class NewsFetcher:
-    def __init__(self):
-        self.feeds = {
-            "Times of India": "https://timesofindia.indiatimes.com/rssfeedstopstories.cms",
-            "NDTV": "https://feeds.feedburner.com/ndtvnews-top-stories",
-            "The Hindu": "https://www.thehindu.com/news/national/feeder/default.rss",
-            "Indian Express": "https://indianexpress.com/feed/",
-            "BBC World": "http://feeds.bbci.co.uk/news/world/rss.xml",
-            "CNN World": "http://rss.cnn.com/rss/edition_world.rss",
-            "Al Jazeera": "https://www.aljazeera.com/xml/rss/all.xml",
-            # Add more as needed
-        }
+    def __init__(self, feeds=None, cache_ttl=300):
+        self.feeds = dict(feeds) if feeds else dict(DEFAULT_FEEDS)
+
+        # Parsed feeds are cached per URL so several channels (or the landscape
+        # and portrait runs of one channel) share a single network round-trip.
+        self.cache_ttl = cache_ttl
+        self._feed_cache = {}
+        self._cache_lock = threading.Lock()
 
     def clean_html(self, raw_html):
         cleanr = re.compile('<.*?>')
         cleantext = re.sub(cleanr, '', raw_html)
         return cleantext.strip()
 
-    def fetch_news(self, hours_back=24):
+    def fetch_feed(self, source, url):
+        """
+        Fetch and normalize every entry of one feed.
+        Results are cached for cache_ttl seconds; entries without a publish
+        time are dropped.
+        """
+        with self._cache_lock:
+            cached = self._feed_cache.get(url)
+            if cached and time.time() - cached[0] < self.cache_ttl:
+                return cached[1]
+
+        print(f"Fetching {source}...")
+        items, _, _ = self.poll_feed(source, url)
+
+        with self._cache_lock:
+            self._feed_cache[url] = (time.time(), items)
+        return items
+
+    def poll_feed(self, source, url, etag=None, modified=None):
+        """
+        Fetch one feed with a conditional GET (no cache).
+        Returns (items, etag, modified); items is empty when the server
+        answers 304 Not Modified.
+        """
+        import feedparser
+        feed = feedparser.parse(url, etag=etag, modified=modified)
+        etag = feed.get("etag", etag)
+        modified = feed.get("modified", modified)
+        if feed.get("status") == 304:
+            return [], etag, modified
+
+        items = []
+        for entry in feed.entries:
+            # Parse published time
+            published_parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+            if not published_parsed:
+                continue
+            published_dt = datetime.fromtimestamp(time.mktime(published_parsed))
+            items.append({
+                "source": source,
+                "title": entry.get("title", ""),
+                "summary": self.clean_html(entry.get("summary", "")),
+                "link": entry.get("link", ""),
+                "published": published_dt.strftime("%Y-%m-%d %H:%M:%S")
+            })
+        return items, etag, modified
+
+    def fetch_news(self, hours_back=24, sources=None):
+        """
+        Fetch recent items from all feeds (or only the named sources),
+        deduplicated across feeds by story_key (the same key the story store
+        uses). Each item is the first feed's copy, with every feed that
+        carried the story in "sources" and each feed's own copy in "copies"
+        (see select_copy).
+        """
         news_items = []
-        cutoff_time = datetime.now() - timedelta(hours=hours_back)
+        by_key = {}
+        cutoff = (datetime.now() - timedelta(hours=hours_back)).strftime("%Y-%m-%d %H:%M:%S")
 
         for source, url in self.feeds.items():
+            if sources is not None and source not in sources:
+                continue
             try:
-                print(f"Fetching {source}...")
-                feed = feedparser.parse(url)
-                
-                for entry in feed.entries:
-                    # Parse published time
-                    published_parsed = entry.get("published_parsed") or entry.get("updated_parsed")
-                    if published_parsed:
-                        published_dt = datetime.fromtimestamp(time.mktime(published_parsed))
-                        
-                        if published_dt > cutoff_time:
-                            summary = self.clean_html(entry.get("summary", ""))
-                            title = entry.get("title", "")
-                            
-                            # Basic deduplication check (very simple)
-                            if not any(item['title'] == title for item in news_items):
-                                news_items.append({
-                                    "source": source,
-                                    "title": title,
-                                    "summary": summary,
-                                    "link": entry.get("link", ""),
-                                    "published": published_dt.strftime("%Y-%m-%d %H:%M:%S")
-                                })
+                for item in self.fetch_feed(source, url):
+                    # "published" is zero-padded, so string order is time order
+                    if item["published"] <= cutoff:
+                        continue
+                    key = story_key(item["title"])
+                    copy = {field: item.get(field, "") for field in COPY_FIELDS}
+                    if key in by_key:
+                        seen = by_key[key]
+                        if source not in seen["sources"]:
+                            seen["sources"].append(source)
+                            seen["copies"][source] = copy
+                        continue
+                    item = dict(item, source=source, sources=[source], copies={source: copy})
+                    by_key[key] = item
+                    news_items.append(item)
             except Exception as e:
                 print(f"Error fetching {source}: {e}")
 
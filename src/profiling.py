@@ -0,0 +1,195 @@
+"""
+Per-stage profiling.
+Each pipeline stage (fetch, script, tts, render) runs under its own
+cProfile profiler and is written to <output_dir>/<stage>.pstats plus a
+collapsed-stack file (<stage>.collapsed) for flamegraph.pl / speedscope.
+Optionally tracemalloc samples the heap while the stage runs and records
+the top allocation sites at the largest sample, which catches per-frame
+buffers in the render loop that are freed before the stage ends.
+"""
+
+import os
+import threading
+from contextlib import contextmanager, nullcontext
+
+# cProfile can only have one active profiler at a time on newer Pythons, so
+# profiled stages from concurrent channel workers run one after another
+_profile_lock = threading.Lock()
+
+# Allocations are attributed to the innermost frame under the project root,
+# so buffers allocated inside NumPy/MoviePy show up at the line that asked
+# for them; deep library stacks need enough frames to reach that line
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRACEMALLOC_FRAMES = 30
+
+def _frame_label(func):
+    filename, line, name = func
+    if filename == "~":
+        # Built-ins are reported as ('~', 0, '<built-in method ...>')
+        label = name
+    else:
+        label = f"{name} ({os.path.basename(filename)}:{line})"
+    # ';' separates frames in the collapsed format
+    return label.replace(";", ",")
+
+def write_collapsed(stats, path, max_depth=64, min_fraction=1e-4):
+    """
+    Write pstats data as collapsed stacks ("a;b;c <microseconds>").
+    cProfile only records caller->callee edges, so each callee's time is
+    split across its callers in proportion to the cumulative time each
+    edge accounts for. Paths carrying less than min_fraction of the total
+    time are dropped; without that the number of reconstructed paths grows
+    exponentially with call-graph depth.
+    """
+    entries = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    roots = [func for func, (_, _, _, _, callers) in entries.items() if not callers]
+    min_time = min_fraction * sum(entries[func][3] for func in roots)
+    lines = {}
+
+    def visit(func, scale, stack):
+        self_time = entries[func][2]
+        key = ";".join(stack)
+        lines[key] = lines.get(key, 0) + self_time * scale
+        if len(stack) >= max_depth:
+            return
+        for child, edge_time in callees.get(func, []):
+            child_total = entries[child][3]
+            label = _frame_label(child)
+            # Recursion is folded into the first occurrence
+            if label in stack or not child_total or scale * edge_time < min_time:
+                continue
+            visit(child, scale * edge_time / child_total, stack + [label])
+
+    for func in roots:
+        visit(func, 1.0, [_frame_label(func)])
+
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, seconds in sorted(lines.items()):
+            micros = int(round(seconds * 1e6))
+            if micros > 0:
+                f.write(f"{stack} {micros}\n")
+
+def _in_project(filename):
+    # A virtualenv inside the checkout is still library code
+    return filename.startswith(PROJECT_ROOT) and "site-packages" not in filename
+
+def _site(frame):
+    filename = frame.filename
+    if _in_project(filename):
+        filename = os.path.relpath(filename, PROJECT_ROOT)
+    return f"{filename}:{frame.lineno}"
+
+def project_allocation_sites(snapshot):
+    """
+    Group a tracemalloc snapshot by the innermost frame inside the project
+    (falling back to the allocating frame) and return report lines, largest
+    first.
+    """
+    sites = {}
+    for trace in snapshot.traces:
+        # Frames run from the oldest call to the allocating one
+        frames = list(trace.traceback)
+        innermost = frames[-1]
+        owner = next((frame for frame in reversed(frames) if _in_project(frame.filename)), innermost)
+        key = (_site(owner), _site(innermost) if owner is not innermost else None)
+        size, count = sites.get(key, (0, 0))
+        sites[key] = (size + trace.size, count + 1)
+
+    lines = []
+    for (owner, allocator), (size, count) in sorted(sites.items(), key=lambda kv: kv[1][0], reverse=True):
+        via = f" [{allocator}]" if allocator else ""
+        lines.append(f"{owner}{via}: size={size / 1024:.1f} KiB, count={count}")
+    return lines
+
+class StageProfiler:
+    def __init__(self, output_dir, memory=False, top=25):
+        self.output_dir = output_dir
+        self.memory = memory
+        self.top = top
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    @contextmanager
+    def stage(self, name):
+        """Profile the enclosed block as one stage and save its reports."""
+        import cProfile
+        import pstats
+        import tracemalloc
+
+        with _profile_lock:
+            started_tracing = False
+            sampler = None
+            if self.memory:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(TRACEMALLOC_FRAMES)
+                    started_tracing = True
+                sampler = _HeapSampler()
+                sampler.start()
+
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                # Stop sampling before any report is built, so the profiler's
+                # own allocations never reach the heap snapshot
+                if sampler is not None:
+                    snapshot, size = sampler.finish()
+                    if started_tracing:
+                        tracemalloc.stop()
+                base = os.path.join(self.output_dir, name)
+
+                stats = pstats.Stats(profile)
+                stats.dump_stats(base + ".pstats")
+                write_collapsed(stats, base + ".collapsed")
+
+                if sampler is not None:
+                    snapshot = snapshot.filter_traces([
+                        tracemalloc.Filter(False, tracemalloc.__file__, all_frames=True),
+                        tracemalloc.Filter(False, __file__, all_frames=True),
+                        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+                    ])
+                    with open(base + ".tracemalloc.txt", "w", encoding="utf-8") as f:
+                        f.write(f"Largest sampled heap: {size / 1024 / 1024:.1f} MiB\n")
+                        f.write(f"Top {self.top} allocation sites at that sample "
+                                f"(innermost project line, allocating line in brackets):\n")
+                        for line in project_allocation_sites(snapshot)[:self.top]:
+                            f.write(f"{line}\n")
+
+                print(f"[INFO] Profile for stage '{name}' saved to {base}.pstats")
+
+class _HeapSampler(threading.Thread):
+    """Keeps the tracemalloc snapshot taken when the traced heap was largest."""
+    def __init__(self, interval=0.5):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self._done = threading.Event()
+        self.snapshot = None
+        self.size = -1
+
+    def _sample(self):
+        import tracemalloc
+        current, _ = tracemalloc.get_traced_memory()
+        if current > self.size:
+            self.size = current
+            self.snapshot = tracemalloc.take_snapshot()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self._sample()
+
+    def finish(self):
+        self._done.set()
+        self.join()
+        self._sample()
+        return self.snapshot, self.size
+
+class NullProfiler:
+    """Stand-in used when profiling is off; stages run unwrapped."""
+    def stage(self, name):
+        return nullcontext()
@@ -0,0 +1,185 @@
+"""
+Event-driven render scheduler.
+Instead of rendering on a fixed interval, checks the candidate stories
+every few minutes and renders only when enough fresh, high-ranked stories
+have built up, or when the deadline since the last render has passed and
+there is at least something new. Failures back off exponentially with
+jitter. Every decision is recorded in a stats file so the compute saved
+over fixed-interval rendering can be checked.
+"""
+
+import os
+import json
+import time
+import random
+from datetime import datetime
+
+def story_score(item, now=None, half_life_hours=3.0):
+    """
+    Rank a story between 0 and 1: halves every half_life_hours since it was
+    published, and halves again if it has no summary to read out.
+    """
+    now = now or datetime.now()
+    try:
+        published = datetime.strptime(item["published"], "%Y-%m-%d %H:%M:%S")
+        age_hours = max(0.0, (now - published).total_seconds() / 3600)
+    except (KeyError, ValueError):
+        age_hours = half_life_hours
+    score = 0.5 ** (age_hours / half_life_hours)
+    if not item.get("summary"):
+        score *= 0.5
+    return score
+
+def backoff_delay(failures, base=60, cap=3600):
+    """Exponential backoff with equal jitter: a random delay in [d/2, d], d = min(cap, base * 2^(failures-1))."""
+    delay = min(cap, base * 2 ** max(0, failures - 1))
+    return random.uniform(delay / 2, delay)
+
+class RenderScheduler:
+    def __init__(self, generator, deadline_minutes=60, check_minutes=5, min_fresh=5, min_score=0.5,
+                 hours_back=6, max_stories=15, backoff_base=60, backoff_cap=3600, stats_path=None):
+        self.generator = generator
+        self.deadline = deadline_minutes * 60
+        self.check_interval = check_minutes * 60
+        self.min_fresh = min_fresh
+        self.min_score = min_score
+        self.hours_back = hours_back
+        self.max_stories = max_stories
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.stats_path = stats_path or os.path.join(generator.output_dir, "scheduler_stats.json")
+
+        self.failures = 0
+        self.stats = self.load_stats()
+        # The deadline carries over restarts; with no earlier render the first
+        # check renders as soon as anything is fresh
+        performed = [c for c in self.stats["cycles"] if c["action"] == "performed"]
+        self.last_render = 0.0
+        if performed:
+            self.last_render = datetime.strptime(performed[-1]["time"], "%Y-%m-%d %H:%M:%S").timestamp()
+
+    def load_stats(self):
+        """Load cumulative stats from earlier runs, if any."""
+        stats = {"performed": 0, "skipped": 0, "failed": 0, "render_seconds": 0.0,
+                 "running_seconds": 0.0, "cycles": []}
+        try:
+            with open(self.stats_path, "r") as f:
+                stats.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+        return stats
+
+    def record(self, action, reason, fresh=0, ranked=0, seconds=0.0):
+        """Record one scheduling decision and rewrite the stats file."""
+        stats = self.stats
+        stats[action] += 1
+        if action != "skipped":
+            stats["render_seconds"] += seconds
+        stats["cycles"].append({
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "action": action,
+            "reason": reason,
+            "fresh": fresh,
+            "ranked": ranked,
+            "seconds": round(seconds, 1),
+        })
+        # Keep the log bounded; the counters stay cumulative
+        stats["cycles"] = stats["cycles"][-500:]
+
+        # A fixed-interval loop would have rendered once per deadline period
+        renders = stats["performed"] + stats["failed"]
+        baseline = int(stats["running_seconds"] // self.deadline) + 1
+        mean_render = stats["render_seconds"] / renders if renders else 0.0
+        stats["fixed_interval_renders"] = baseline
+        stats["estimated_saved_seconds"] = round(max(0, baseline - renders) * mean_render, 1)
+
+        try:
+            with open(self.stats_path, "w") as f:
+                json.dump(stats, f, indent=2)
+        except OSError as e:
+            print(f"[WARN] Could not save scheduler stats: {e}")
+
+    def rank_candidates(self):
+        """Return (fresh items ordered best first, number of high-ranked fresh items)."""
+        items = self.generator.fetch_candidates(hours_back=self.hours_back)
+        used_titles = self.generator.load_history()
+        now = datetime.now()
+        scored = [(story_score(item, now), item) for item in items if item["title"] not in used_titles]
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        ranked = sum(1 for score, _ in scored if score >= self.min_score)
+        return [item for _, item in scored], ranked
+
+    def render(self, fresh):
+        """
+        Render the landscape video from the top-ranked fresh items and the
+        short from the next ones, so the short does not repeat the landscape's
+        stories while unused ones are waiting. Returns True if both succeeded.
+        """
+        top = fresh[:self.max_stories]
+        landscape = self.generator.generate_news_video(max_stories=self.max_stories, news_items=top,
+                                                       shuffle=False)
+        short = self.generator.generate_short_video(news_items=fresh[self.max_stories:] or top,
+                                                    shuffle=False)
+        return landscape is not None and short is not None
+
+    def run_once(self):
+        """
+        Check the candidates once and render if warranted. Returns the number
+        of seconds to wait before the next check.
+        """
+        try:
+            fresh, ranked = self.rank_candidates()
+        except Exception as e:
+            self.failures += 1
+            wait = backoff_delay(self.failures, self.backoff_base, self.backoff_cap)
+            print(f"[ERROR] Could not load candidates: {e}")
+            print(f"[INFO] Retrying in {wait / 60:.1f} minutes (failure {self.failures})")
+            self.record("failed", f"fetch: {e}")
+            return wait
+
+        overdue = time.time() - self.last_render >= self.deadline
+        if ranked >= self.min_fresh:
+            reason = f"{ranked} high-ranked fresh stories"
+        elif overdue and fresh:
+            reason = f"deadline reached with {len(fresh)} fresh stories"
+        else:
+            reason = "nothing fresh" if not fresh else f"only {ranked}/{self.min_fresh} high-ranked fresh stories"
+            print(f"[INFO] Skipping render: {reason}")
+            self.record("skipped", reason, len(fresh), ranked)
+            return self.check_interval
+
+        print(f"[INFO] Rendering: {reason}")
+        started = time.time()
+        ok = self.render(fresh)
+        seconds = time.time() - started
+
+        if ok:
+            self.failures = 0
+            self.last_render = time.time()
+            self.record("performed", reason, len(fresh), ranked, seconds)
+            return self.check_interval
+
+        self.failures += 1
+        wait = backoff_delay(self.failures, self.backoff_base, self.backoff_cap)
+        print(f"[WARN] Render failed, retrying in {wait / 60:.1f} minutes (failure {self.failures})")
+        self.record("failed", reason, len(fresh), ranked, seconds)
+        return wait
+
+    def run_forever(self):
+        """Check and render until interrupted."""
+        print(f"Render scheduler: check every {self.check_interval / 60:g} min, render at "
+              f"{self.min_fresh} high-ranked fresh stories or after {self.deadline / 60:g} min")
+        while True:
+            started = time.time()
+            try:
+                wait = self.run_once()
+                print(f"\nNext check in {wait / 60:.1f} minutes...")
+                time.sleep(wait)
+            except KeyboardInterrupt:
+                print("\n\nStopped by user.")
+                break
+            finally:
+                self.stats["running_seconds"] += time.time() - started
+
+        print(f"[INFO] Cycles performed: {self.stats['performed']}, skipped: {self.stats['skipped']}, "
+              f"failed: {self.stats['failed']} (stats in {self.stats_path})")
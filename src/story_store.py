@@ -0,0 +1,177 @@
+"""
+Local story store.
+SQLite database of normalized, deduplicated news items written by the
+feed ingestor and read by the generators, plus the ingestor's per-feed
+polling state.
+"""
+
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from src.news_fetcher import story_key, select_copy, COPY_FIELDS
+
+class StoryStore:
+    def __init__(self, db_path="output/stories.db"):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            # WAL lets generators read while the ingestor writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS stories (
+                    key TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    summary TEXT,
+                    link TEXT,
+                    published TEXT NOT NULL,
+                    first_seen TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_stories_published ON stories (published);
+                CREATE INDEX IF NOT EXISTS idx_stories_source_published ON stories (source, published);
+                -- Every feed that carried a story with its own copy of it, so
+                -- channels on any of them get it credited to their feed
+                CREATE TABLE IF NOT EXISTS story_sources (
+                    key TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    title TEXT,
+                    summary TEXT,
+                    link TEXT,
+                    published TEXT,
+                    PRIMARY KEY (source, key)
+                );
+                CREATE INDEX IF NOT EXISTS idx_story_sources_key ON story_sources (key);
+                CREATE TABLE IF NOT EXISTS feed_state (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    modified TEXT,
+                    interval REAL NOT NULL,
+                    next_poll REAL NOT NULL
+                );
+            """)
+            # Databases from before per-feed copies were kept
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(story_sources)")}
+            for field in COPY_FIELDS:
+                if field not in columns:
+                    conn.execute(f"ALTER TABLE story_sources ADD COLUMN {field} TEXT")
+            conn.execute("""
+                INSERT OR IGNORE INTO story_sources (key, source, title, summary, link, published)
+                SELECT key, source, title, summary, link, published FROM stories
+            """)
+            conn.execute("""
+                UPDATE story_sources SET (title, summary, link, published) = (
+                    SELECT s.title, s.summary, s.link, s.published FROM stories s
+                    WHERE s.key = story_sources.key AND s.source = story_sources.source)
+                WHERE title IS NULL
+            """)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps the store safe to share
+        # between threads (ingestor, channel workers)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add_items(self, items):
+        """
+        Insert news items, skipping stories already stored (by story_key) but
+        recording each extra feed's copy of them. Returns the number added.
+        """
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = [
+            (story_key(item["title"]), item["source"], item["title"], item.get("summary", ""),
+             item.get("link", ""), item["published"], now)
+            for item in items if item.get("title")
+        ]
+        with self._connect() as conn:
+            added = conn.executemany(
+                "INSERT OR IGNORE INTO stories (key, source, title, summary, link, published, first_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows).rowcount
+            conn.executemany(
+                "INSERT OR IGNORE INTO story_sources (key, source, title, summary, link, published) "
+                "VALUES (?, ?, ?, ?, ?, ?)", [row[:6] for row in rows])
+            return added
+
+    def recent(self, hours_back=24, sources=None, limit=None):
+        """
+        Return items published in the last hours_back hours, newest first,
+        shaped like NewsFetcher.fetch_news results ("sources" and "copies").
+        With a sources filter each item is the copy of the first of its feeds
+        in the filter, as a fetch of only those feeds would return it.
+        """
+        cutoff = (datetime.now() - timedelta(hours=hours_back)).strftime("%Y-%m-%d %H:%M:%S")
+        picked = "SELECT key, source, published FROM stories WHERE published > ?"
+        params = [cutoff]
+        if sources is not None:
+            sources = list(sources)
+            if not sources:
+                return []
+            picked += (" AND key IN (SELECT key FROM story_sources "
+                       f"WHERE source IN ({', '.join('?' * len(sources))}))")
+            params += sources
+        picked += " ORDER BY published DESC"
+        if limit:
+            picked += " LIMIT ?"
+            params.append(limit)
+        # The feed that first delivered a story leads, then the others in the
+        # order they were seen
+        query = (f"WITH picked AS ({picked}) "
+                 "SELECT p.key, p.source AS first_source, ss.source, ss.title, ss.summary, ss.link, "
+                 "ss.published FROM picked p JOIN story_sources ss ON ss.key = p.key "
+                 "ORDER BY p.published DESC, p.key, ss.source != p.source, ss.rowid")
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        items = []
+        by_key = {}
+        for row in rows:
+            copy = {field: row[field] for field in COPY_FIELDS}
+            item = by_key.get(row["key"])
+            if item is None:
+                item = dict(copy, source=row["source"], sources=[], copies={})
+                by_key[row["key"]] = item
+                items.append(item)
+            item["sources"].append(row["source"])
+            # Feeds recorded before copies were kept have none of their own
+            if copy["title"] is not None:
+                item["copies"][row["source"]] = copy
+
+        if sources is not None:
+            # Only the filtered feeds, as a fetch of just those feeds would see
+            for item in items:
+                item["sources"] = [s for s in item["sources"] if s in sources]
+                item["copies"] = {s: c for s, c in item["copies"].items() if s in sources}
+            items = [select_copy(item, sources) for item in items]
+        return items
+
+    def prune(self, days=7):
+        """Delete stories published more than days ago. Returns the number removed."""
+        cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+        with self._connect() as conn:
+            removed = conn.execute("DELETE FROM stories WHERE published < ?", (cutoff,)).rowcount
+            conn.execute("DELETE FROM story_sources WHERE key NOT IN (SELECT key FROM stories)")
+            return removed
+
+    def get_feed_state(self, url):
+        with self._connect() as conn:
+            row = conn.execute("SELECT etag, modified, interval, next_poll FROM feed_state WHERE url = ?",
+                               (url,)).fetchone()
+        return dict(row) if row else None
+
+    def save_feed_state(self, url, etag, modified, interval, next_poll):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO feed_state (url, etag, modified, interval, next_poll) "
+                "VALUES (?, ?, ?, ?, ?)", (url, etag, modified, interval, next_poll))
+
+if __name__ == "__main__":
+    store = StoryStore()
+    for item in store.recent(hours_back=6, limit=5):
+        print(f"[{item['source']}] {item['title']}")
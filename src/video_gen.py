@@ -1,14 +1,618 @@
 """
 Video Generator using MoviePy.
 Creates video with anchor image, audio, and text overlays.
+MoviePy is imported inside the functions that render, so importing this
+module stays cheap for stages that never touch video.
 """
 
-from moviepy import AudioFileClip, ImageClip, ColorClip, TextClip, CompositeVideoClip, VideoFileClip
-from PIL import Image, ImageDraw, ImageFont
 import os
+import glob
+import threading
+
+# Resized anchor clips shared by every VideoGenerator in the process, keyed by
+# (path, mtime, width, height). Channels rendering with the same anchor art
+# decode and resize each image only once.
+_anchor_cache = {}
+_anchor_cache_lock = threading.Lock()
+
+def load_anchor_clip(image_path, width, height):
+    """Load an anchor image resized to fit width x height, using the shared cache."""
+    key = (os.path.abspath(image_path), os.path.getmtime(image_path), width, height)
+    with _anchor_cache_lock:
+        clip = _anchor_cache.get(key)
+    if clip is None:
+        from moviepy import ImageClip
+        clip = ImageClip(image_path)
+        # Resize to fit the frame while maintaining aspect ratio
+        clip = clip.resized(height=height)
+        if clip.w > width:
+            clip = clip.resized(width=width)
+        clip = clip.with_position("center")
+        with _anchor_cache_lock:
+            clip = _anchor_cache.setdefault(key, clip)
+    return clip
+
+# Each anchor image shows for 0.3 seconds when several anchor*.png exist
+ANCHOR_FRAME_DURATION = 0.3
+BACKGROUND_COLOR = (20, 30, 50)
+HLS_SEGMENT_SECONDS = 4
+
+# First existing font wins; None lets Pillow/MoviePy use their built-in font
+SUBTITLE_FONTS = [
+    "C:/Windows/Fonts/arial.ttf",
+    "/Library/Fonts/Arial.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+]
+
+def resolve_font_path():
+    for font_path in SUBTITLE_FONTS:
+        if os.path.exists(font_path):
+            return font_path
+    return None
+
+def find_anchor_images(anchor_image_path):
+    """Return the anchor*.png images next to anchor_image_path, or just that image."""
+    anchor_dir = os.path.dirname(anchor_image_path)
+    anchor_images = sorted(glob.glob(os.path.join(anchor_dir, "anchor*.png")))
+    if len(anchor_images) > 1:
+        return anchor_images
+    return [anchor_image_path]
+
+def parse_srt(filepath):
+    """
+    Manual SRT parser to avoid MoviePy parsing issues.
+    Returns a list of ((start, end), text) with times in seconds.
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    subtitles = []
+    blocks = content.strip().split('\n\n')
+    
+    def to_seconds(t):
+        parts = t.split(':')
+        return int(parts[0])*3600 + int(parts[1])*60 + float(parts[2])
+    
+    for block in blocks:
+        lines = block.strip().split('\n')
+        if len(lines) >= 3:
+            # Parse timestamp 00:00:00,000 --> 00:00:00,000
+            times = lines[1].split(' --> ')
+            if len(times) != 2:
+                continue
+            
+            start = to_seconds(times[0].strip().replace(',', '.'))
+            end = to_seconds(times[1].strip().replace(',', '.'))
+            
+            # Parse text (join remaining lines)
+            text = '\n'.join(lines[2:])
+            subtitles.append(((start, end), text))
+    return subtitles
+
+def ffmpeg_exe():
+    """Locate ffmpeg: the binary bundled with imageio-ffmpeg (a MoviePy dependency), else PATH."""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return "ffmpeg"
+
+def probe_duration(media_path):
+    """Read a media file's duration in seconds from ffmpeg's stream info."""
+    import re
+    import subprocess
+    
+    result = subprocess.run([ffmpeg_exe(), "-hide_banner", "-i", media_path],
+                            capture_output=True, text=True)
+    match = re.search(r"Duration: (\d+):(\d+):(\d+\.\d+)", result.stderr)
+    if not match:
+        raise RuntimeError(f"Could not read duration of {media_path}")
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+def _ass_timestamp(seconds):
+    centiseconds = int(round(seconds * 100))
+    hours, centiseconds = divmod(centiseconds, 360000)
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    secs, centiseconds = divmod(centiseconds, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+
+def srt_to_ass(srt_path, ass_path, width, height, font_size=50):
+    """
+    Convert an SRT file to an ASS track styled like the burned-in captions:
+    white text with a black outline, centered, wrapped to 80% of the width,
+    top edge at 85% of the height.
+    """
+    font_path = resolve_font_path()
+    font_name = "Arial"
+    if font_path and "DejaVu" in font_path:
+        font_name = "DejaVu Sans"
+    margin_h = int(width * 0.1)
+    margin_v = int(height * 0.85)
+    
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {width}",
+        f"PlayResY: {height}",
+        "WrapStyle: 0",
+        "ScaledBorderAndShadow: yes",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+        "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+        "Alignment, MarginL, MarginR, MarginV, Encoding",
+        # Alignment 8 = top center, so MarginV is the distance from the top edge
+        f"Style: Default,{font_name},{font_size},&H00FFFFFF,&H00FFFFFF,&H00000000,&H00000000,"
+        f"0,0,0,0,100,100,0,0,1,2,0,8,{margin_h},{margin_h},{margin_v},1",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    for (start, end), text in parse_srt(srt_path):
+        text = text.replace("{", "(").replace("}", ")").replace("\n", "\\N")
+        lines.append(f"Dialogue: 0,{_ass_timestamp(start)},{_ass_timestamp(end)},Default,,0,0,0,,{text}")
+    
+    with open(ass_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return ass_path
+
+def ass_filter(ass_path):
+    """Build an ffmpeg `ass` filter argument, escaping the path for the filtergraph."""
+    path = os.path.abspath(ass_path).replace("\\", "/").replace(":", "\\:")
+    return f"ass='{path}'"
+
+def audio_codec_args(audio_path):
+    """Stream-copy audio that is already AAC (the finalized TTS track); encode anything else once."""
+    if os.path.splitext(audio_path)[1].lower() in (".m4a", ".aac"):
+        return ["-c:a", "copy"]
+    return ["-c:a", "aac"]
+
+def mux_streams(video_path, output_path, audio_path=None, subtitle_path=None):
+    """
+    Stream-copy video_path's video into output_path, taking audio from
+    audio_path (or video_path when None) and optionally attaching
+    subtitle_path as a soft mov_text track. Nothing is re-encoded except a
+    non-AAC audio input. Safe to call with output_path == video_path.
+    """
+    import subprocess
+    
+    root, ext = os.path.splitext(output_path)
+    temp_output = f"{root}.remux{ext}"
+    command = [ffmpeg_exe(), "-y", "-loglevel", "error", "-i", video_path]
+    maps = ["-map", "0:v"]
+    codecs = ["-c:v", "copy"]
+    if audio_path:
+        command += ["-i", audio_path]
+        maps += ["-map", "1:a"]
+        codecs += audio_codec_args(audio_path)
+    else:
+        maps += ["-map", "0:a?"]
+        codecs += ["-c:a", "copy"]
+    if subtitle_path:
+        command += ["-i", subtitle_path]
+        maps += ["-map", f"{2 if audio_path else 1}:0"]
+        codecs += ["-c:s", "mov_text", "-metadata:s:s:0", "language=eng"]
+    subprocess.run(command + maps + codecs + [temp_output], check=True)
+    os.replace(temp_output, output_path)
+    return output_path
+
+def mux_subtitles(video_path, subtitle_path, output_path=None):
+    """
+    Attach subtitle_path as the soft (mov_text) subtitle track of video_path.
+    Any existing subtitle track is replaced, so fixing a caption is a remux
+    rather than a re-render. Writes in place when output_path is None.
+    """
+    return mux_streams(video_path, output_path or video_path, subtitle_path=subtitle_path)
+
+class FrameCompositor:
+    """
+    NumPy render engine.
+    The picture is always the background, one of N anchor images and at most
+    one caption, so the background+anchor frames are composited once up front
+    and each output frame is a copy of one of them with the caption tile
+    alpha-blended inside its bounding box. All per-frame work happens in
+    preallocated buffers and raw RGB frames are piped straight into ffmpeg.
+    """
+    def __init__(self, width, height, fps=24, font_size=50, background=BACKGROUND_COLOR):
+        import numpy as np
+        
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.font_size = font_size
+        self.background = background
+        
+        self.frame = np.empty((height, width, 3), dtype=np.uint8)
+        # uint16 scratch for blending: 255 * 255 fits without overflow
+        self._scratch = np.empty((height, width, 3), dtype=np.uint16)
+        self._caption_cache = {}
+        self._font = None
+    
+    def load_anchor_frames(self, anchor_images):
+        """Composite each anchor image, fitted and centered, onto the background."""
+        import numpy as np
+        from PIL import Image
+        
+        frames = []
+        for img_path in anchor_images:
+            # Shares the anchor asset cache with load_anchor_clip
+            key = ("frame", os.path.abspath(img_path), os.path.getmtime(img_path),
+                   self.width, self.height, self.background)
+            with _anchor_cache_lock:
+                frame = _anchor_cache.get(key)
+            if frame is None:
+                base = Image.new("RGB", (self.width, self.height), self.background)
+                with Image.open(img_path) as img:
+                    img = img.convert("RGBA")
+                    # Resize to fit the frame while maintaining aspect ratio
+                    scale = min(self.height / img.height, self.width / img.width)
+                    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+                    img = img.resize(size, Image.LANCZOS)
+                    offset = ((self.width - size[0]) // 2, (self.height - size[1]) // 2)
+                    base.paste(img, offset, img)
+                frame = np.array(base, dtype=np.uint8)
+                frame.flags.writeable = False
+                with _anchor_cache_lock:
+                    frame = _anchor_cache.setdefault(key, frame)
+            frames.append(frame)
+        return frames
+    
+    def _get_font(self):
+        if self._font is None:
+            from PIL import ImageFont
+            font_path = resolve_font_path()
+            if font_path:
+                self._font = ImageFont.truetype(font_path, self.font_size)
+            else:
+                self._font = ImageFont.load_default(size=self.font_size)
+        return self._font
+    
+    def _wrap(self, draw, text, max_width):
+        font = self._get_font()
+        lines = []
+        for paragraph in text.split("\n"):
+            line = ""
+            for word in paragraph.split():
+                candidate = f"{line} {word}".strip()
+                if line and draw.textlength(candidate, font=font) > max_width:
+                    lines.append(line)
+                    line = word
+                else:
+                    line = candidate
+            lines.append(line)
+        return "\n".join(lines)
+    
+    def render_caption(self, text):
+        """
+        Render a caption once into a premultiplied RGB tile plus inverse alpha.
+        Returns (premultiplied, inverse_alpha, x, y), clipped to the frame.
+        """
+        if text in self._caption_cache:
+            return self._caption_cache[text]
+        
+        import math
+        import numpy as np
+        from PIL import Image, ImageDraw
+        
+        font = self._get_font()
+        stroke = 2
+        measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+        wrapped = self._wrap(measure, text, int(self.width * 0.8))
+        left, top, right, bottom = measure.multiline_textbbox(
+            (0, 0), wrapped, font=font, align="center", stroke_width=stroke)
+        left, top, right, bottom = int(left), int(top), math.ceil(right), math.ceil(bottom)
+        tile_w, tile_h = right - left, bottom - top
+        
+        tile = Image.new("RGBA", (tile_w, tile_h), (0, 0, 0, 0))
+        ImageDraw.Draw(tile).multiline_text(
+            (-left, -top), wrapped, font=font, fill="white", align="center",
+            stroke_width=stroke, stroke_fill="black")
+        
+        # Same placement as the MoviePy path: centered, top edge at 85% height
+        x = (self.width - tile_w) // 2
+        y = int(self.height * 0.85)
+        rgba = np.asarray(tile, dtype=np.uint16)
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + tile_w, self.width), min(y + tile_h, self.height)
+        rgba = rgba[y0 - y:y1 - y, x0 - x:x1 - x]
+        
+        alpha = rgba[:, :, 3:4]
+        premultiplied = np.ascontiguousarray(rgba[:, :, :3] * alpha)
+        inverse_alpha = np.ascontiguousarray(255 - alpha)
+        caption = (premultiplied, inverse_alpha, x0, y0)
+        self._caption_cache[text] = caption
+        return caption
+    
+    def compose(self, base, caption=None):
+        """Fill self.frame with base and blend caption into its bounding box in place."""
+        import numpy as np
+        
+        np.copyto(self.frame, base)
+        if caption is not None:
+            premultiplied, inverse_alpha, x, y = caption
+            h, w = inverse_alpha.shape[:2]
+            region = self.frame[y:y + h, x:x + w]
+            scratch = self._scratch[:h, :w]
+            np.multiply(region, inverse_alpha, out=scratch)
+            np.add(scratch, premultiplied, out=scratch)
+            np.floor_divide(scratch, 255, out=scratch)
+            np.copyto(region, scratch, casting="unsafe")
+        return self.frame
+    
+    def encoder_command(self, audio_path, output_path, duration, video_filter=None, subtitle_track=None,
+                        output_format="mp4", frame_list=None):
+        """
+        Build the ffmpeg command. Video is read as raw frames from stdin, or,
+        when frame_list is given, from that ffconcat list of distinct frames
+        with durations and written with variable-frame-rate timestamps.
+        """
+        command = [ffmpeg_exe(), "-y", "-loglevel", "error"]
+        if frame_list:
+            command += ["-f", "concat", "-safe", "0", "-i", frame_list]
+        else:
+            command += ["-f", "rawvideo", "-pix_fmt", "rgb24",
+                        "-s", f"{self.width}x{self.height}", "-r", str(self.fps), "-i", "-"]
+        command += ["-i", audio_path]
+        maps = ["-map", "0:v", "-map", "1:a"]
+        # HLS gets the subtitle track as a sidecar only
+        if subtitle_track and output_format != "hls":
+            command += ["-i", subtitle_track]
+            maps += ["-map", "2:0", "-c:s", "mov_text", "-metadata:s:s:0", "language=eng"]
+        command += maps
+        if frame_list:
+            command += ["-fps_mode", "vfr"]
+        if video_filter:
+            command += ["-vf", video_filter]
+        # The output is cut at the audio length rather than with -shortest:
+        # a soft subtitle stream ends at its last caption, and with VFR the
+        # last frame can start well before the end
+        command += ["-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+                    *audio_codec_args(audio_path), "-t", f"{duration:.3f}"]
+        
+        if output_format == "mp4":
+            return command + [output_path]
+        
+        # Streaming formats: a keyframe at every segment boundary so each
+        # fragment/segment is independently decodable as soon as it is written
+        command += ["-force_key_frames", f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})"]
+        if output_format == "fmp4":
+            return command + ["-movflags", "+frag_keyframe+empty_moov+default_base_moof",
+                              "-f", "mp4", output_path]
+        segment_dir = os.path.dirname(output_path)
+        return command + [
+            "-f", "hls", "-hls_time", str(HLS_SEGMENT_SECONDS),
+            "-hls_playlist_type", "event",
+            "-hls_segment_type", "fmp4", "-hls_fmp4_init_filename", "init.mp4",
+            "-hls_segment_filename", os.path.join(segment_dir, "seg_%05d.m4s"),
+            "-hls_flags", "independent_segments+temp_file",
+            output_path,
+        ]
+    
+    def timeline(self, total_frames, anchor_count, subtitles, cue_times=()):
+        """
+        Split the video into runs of identical frames.
+        The picture only changes when the anchor image cycles or a caption
+        starts/ends, so only those boundaries are examined. cue_times are
+        extra change points drawn by the encoder (libass captions in ass
+        mode); a run always starts around each of them. Returns a list of
+        (start_frame, anchor_index, caption_text or None), one per run.
+        """
+        import math
+        
+        duration = total_frames / self.fps
+        times = [0.0]
+        if anchor_count > 1:
+            times += [k * ANCHOR_FRAME_DURATION
+                      for k in range(1, math.ceil(duration / ANCHOR_FRAME_DURATION) + 1)]
+        for (start, end), _ in subtitles:
+            times += [start, end]
+        
+        # Check the frames either side of each event time so float rounding
+        # can never hide a change; identical neighbouring states are merged
+        candidates = set()
+        for t in times:
+            frame = math.floor(t * self.fps)
+            candidates.update((frame, frame + 1))
+        forced = set()
+        for t in cue_times:
+            frame = math.floor(t * self.fps)
+            forced.update((frame, frame + 1))
+        candidates |= forced
+        
+        runs = []
+        sub_index = 0
+        for i in sorted(c for c in candidates if 0 <= c < total_frames):
+            t = i / self.fps
+            anchor_index = int(t / ANCHOR_FRAME_DURATION) % anchor_count
+            
+            # Times only move forward, so the active caption is found by advancing
+            while sub_index < len(subtitles) and subtitles[sub_index][0][1] <= t:
+                sub_index += 1
+            caption = None
+            if sub_index < len(subtitles) and subtitles[sub_index][0][0] <= t:
+                caption = subtitles[sub_index][1]
+            
+            if not runs or runs[-1][1:] != (anchor_index, caption) or i in forced:
+                runs.append((i, anchor_index, caption))
+        return runs
+    
+    def render(self, audio_path, anchor_images, subtitles, output_path, duration=None, video_filter=None,
+               subtitle_track=None, output_format="mp4", on_segment=None, vfr=False, cue_times=()):
+        """
+        Render the whole video to output_path.
+        subtitles is a list of ((start, end), text) as returned by parse_srt;
+        video_filter is an optional ffmpeg filter applied during the encode and
+        subtitle_track an optional file muxed as a soft subtitle stream.
+        cue_times are the caption start/end times when video_filter draws
+        captions, so VFR output has a frame wherever one appears or clears.
+        output_format is "mp4", "fmp4" (fragmented, readable while growing) or
+        "hls" (output_path is the playlist). For HLS, on_segment is called with
+        each segment path as soon as the playlist lists it.
+        
+        A frame is only composited when the picture changes (see timeline);
+        unchanged frames re-send the same buffer. With vfr, each distinct
+        picture is written once and encoded with its duration instead (see
+        _render_vfr), so nothing scales with duration x fps.
+        Returns (frames written, frames composited).
+        """
+        import math
+        import subprocess
+        
+        if duration is None:
+            duration = probe_duration(audio_path)
+        anchor_frames = self.load_anchor_frames(anchor_images)
+        subtitles = sorted(subtitles)
+        total_frames = math.ceil(duration * self.fps)
+        runs = self.timeline(total_frames, len(anchor_frames), subtitles, cue_times)
+        
+        watch_segments = on_segment is not None and output_format == "hls"
+        seen_segments = set()
+        
+        if vfr:
+            written = self._render_vfr(audio_path, anchor_frames, runs, total_frames, output_path, duration,
+                                       video_filter, subtitle_track, output_format,
+                                       on_segment if watch_segments else None)
+            return written, len(runs)
+        
+        command = self.encoder_command(audio_path, output_path, duration, video_filter, subtitle_track,
+                                       output_format)
+        proc = subprocess.Popen(command, stdin=subprocess.PIPE)
+        try:
+            for n, (start, anchor_index, caption_text) in enumerate(runs):
+                end = runs[n + 1][0] if n + 1 < len(runs) else total_frames
+                caption = self.render_caption(caption_text) if caption_text is not None else None
+                frame = self.compose(anchor_frames[anchor_index], caption)
+                
+                for i in range(start, end):
+                    proc.stdin.write(frame)
+                    if watch_segments and i % self.fps == 0:
+                        _poll_segments(output_path, seen_segments, on_segment)
+        finally:
+            proc.stdin.close()
+            returncode = proc.wait()
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with code {returncode} while writing {output_path}")
+        if watch_segments:
+            _poll_segments(output_path, seen_segments, on_segment)
+        return total_frames, len(runs)
+    
+    def _render_vfr(self, audio_path, anchor_frames, runs, total_frames, output_path, duration,
+                    video_filter, subtitle_track, output_format, on_segment):
+        """
+        Write each distinct picture once as a BMP and encode from an ffconcat
+        list giving every run its duration. Runs are split into entries of at
+        most one second so the encoder still sees a frame (and can place a
+        keyframe) every second. Returns the number of frames written.
+        
+        The HLS muxer sizes the final segment from its packets' default
+        1/fps durations rather than the concat durations, so for HLS that
+        segment is listed frame by frame.
+        """
+        import subprocess
+        import tempfile
+        import time
+        from PIL import Image
+        
+        tail_start = total_frames
+        if output_format == "hls":
+            segment_frames = self.fps * HLS_SEGMENT_SECONDS
+            tail_start = (total_frames - 1) // segment_frames * segment_frames
+        
+        with tempfile.TemporaryDirectory(prefix="vfr_") as tmp:
+            frame_files = {}
+            entries = []
+            for n, (start, anchor_index, caption_text) in enumerate(runs):
+                end = runs[n + 1][0] if n + 1 < len(runs) else total_frames
+                key = (anchor_index, caption_text)
+                if key not in frame_files:
+                    caption = self.render_caption(caption_text) if caption_text is not None else None
+                    frame_files[key] = os.path.join(tmp, f"frame_{len(frame_files):05d}.bmp")
+                    Image.fromarray(self.compose(anchor_frames[anchor_index], caption)).save(frame_files[key])
+                chunk = start
+                while chunk < end:
+                    if chunk >= tail_start:
+                        chunk_end = chunk + 1
+                    else:
+                        chunk_end = min(end, chunk + self.fps, tail_start)
+                    entries.append((frame_files[key], chunk_end - chunk))
+                    chunk = chunk_end
+            # The concat demuxer drops the last entry's duration, so the last
+            # frame slot gets an entry of its own to keep the stream full length
+            path, frames = entries[-1]
+            if frames > 1:
+                entries[-1:] = [(path, frames - 1), (path, 1)]
+            
+            frame_list = os.path.join(tmp, "frames.ffconcat")
+            with open(frame_list, "w", encoding="utf-8") as f:
+                f.write("ffconcat version 1.0\n")
+                for path, frames in entries:
+                    # framerate sets the image demuxer's time base to 1/fps, so
+                    # every duration (a whole number of frames) is exact
+                    f.write(f"file '{path}'\noption framerate {self.fps}\n"
+                            f"duration {frames / self.fps:.6f}\n")
+            
+            command = self.encoder_command(audio_path, output_path, duration, video_filter, subtitle_track,
+                                           output_format, frame_list=frame_list)
+            proc = subprocess.Popen(command)
+            seen_segments = set()
+            while proc.poll() is None:
+                if on_segment is not None:
+                    _poll_segments(output_path, seen_segments, on_segment)
+                time.sleep(0.5)
+        if proc.returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with code {proc.returncode} while writing {output_path}")
+        if on_segment is not None:
+            _poll_segments(output_path, seen_segments, on_segment)
+        return len(entries)
+
+def _poll_segments(playlist_path, seen, on_segment):
+    """
+    Call on_segment for files newly listed in an HLS playlist. The init
+    segment (#EXT-X-MAP) comes before the media segments it precedes, since
+    fMP4 segments cannot be decoded without it.
+    """
+    import re
+    
+    try:
+        with open(playlist_path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return
+    segment_dir = os.path.dirname(playlist_path)
+    for line in lines:
+        line = line.strip()
+        uri = None
+        if line.startswith("#EXT-X-MAP:"):
+            match = re.search(r'URI="([^"]+)"', line)
+            uri = match.group(1) if match else None
+        elif line and not line.startswith("#"):
+            uri = line
+        if uri and uri not in seen:
+            seen.add(uri)
+            on_segment(os.path.join(segment_dir, uri))
+
+ENGINES = ("moviepy", "numpy")
+
+# mp4:  one file, moved into place when the render is complete
+# fmp4: fragmented MP4 written in place; finished fragments are readable while it grows
+# hls:  event playlist + fMP4 segments in <output_dir>/<name>/, updated per segment
+OUTPUT_FORMATS = ("mp4", "fmp4", "hls")
+
+# burn: captions composited by the render engine
+# ass:  SRT converted to a styled ASS track and burned by ffmpeg/libass in the only encode
+# soft: ASS sidecar written next to the video and muxed as a mov_text stream
+SUBTITLE_MODES = ("burn", "ass", "soft")
 
 class VideoGenerator:
-    def __init__(self, output_dir="output/videos", orientation="landscape"):
+    def __init__(self, output_dir="output/videos", orientation="landscape", engine="moviepy", subtitle_mode="burn",
+                 output_format="mp4", on_segment=None, vfr=False):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown render engine '{engine}', expected one of {ENGINES}")
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{output_format}', expected one of {OUTPUT_FORMATS}")
+        if subtitle_mode not in SUBTITLE_MODES:
+            raise ValueError(f"Unknown subtitle mode '{subtitle_mode}', expected one of {SUBTITLE_MODES}")
         self.output_dir = output_dir
         os.makedirs(self.output_dir, exist_ok=True)
         
@@ -21,6 +625,12 @@ class VideoGenerator:
             self.height = 1080
         
         self.orientation = orientation
+        self.engine = engine
+        self.subtitle_mode = subtitle_mode
+        self.output_format = output_format
+        # Called with each finished HLS segment path (e.g. to start uploading)
+        self.on_segment = on_segment
+        self.vfr = vfr
 
     def create_video(self, audio_path, anchor_image_path, headline_text, output_filename="news_video.mp4", subtitle_path=None):
         """
@@ -29,36 +639,110 @@ class VideoGenerator:
         - Audio narration
         - Subtitles (optional)
         """
+        if not (subtitle_path and os.path.exists(subtitle_path)):
+            subtitle_path = None
+        
+        ass_path = None
+        if subtitle_path and self.subtitle_mode != "burn":
+            ass_path = os.path.join(self.output_dir, os.path.splitext(output_filename)[0] + ".ass")
+            srt_to_ass(subtitle_path, ass_path, self.width, self.height)
+            print(f"  Converted subtitles to ASS: {ass_path}")
+        
+        # Progressive formats and VFR need the encoder pipe, which only FrameCompositor drives
+        if self.engine == "numpy" or self.output_format != "mp4" or self.vfr:
+            return self._create_video_numpy(audio_path, anchor_image_path, output_filename, subtitle_path, ass_path)
+        return self._create_video_moviepy(audio_path, anchor_image_path, output_filename, subtitle_path, ass_path)
+
+    def _finish_output(self, temp_output, final_output, ass_path, audio_path=None):
+        """
+        Move the render into place. The audio track (when the render is
+        video-only) and, in soft mode, the ASS track are muxed in with
+        stream copy.
+        """
+        soft_subs = ass_path if self.subtitle_mode == "soft" else None
+        if audio_path or soft_subs:
+            print("  Muxing audio/subtitle streams...")
+            mux_streams(temp_output, final_output, audio_path=audio_path, subtitle_path=soft_subs)
+            os.remove(temp_output)
+        else:
+            os.replace(temp_output, final_output)
+        return final_output
+
+    def _create_video_numpy(self, audio_path, anchor_image_path, output_filename, subtitle_path, ass_path=None):
+        """Render in a single encode with FrameCompositor (captions included)."""
         try:
-            # Load audio
-            audio = AudioFileClip(audio_path)
-            duration = audio.duration
+            anchor_images = find_anchor_images(anchor_image_path)
+            print(f"  Rendering with NumPy compositor ({len(anchor_images)} anchor images)")
+            
+            subtitles = []
+            if subtitle_path and self.subtitle_mode == "burn":
+                subtitles = parse_srt(subtitle_path)
+                print(f"  Parsed {len(subtitles)} subtitles")
+            video_filter = None
+            cue_times = []
+            if ass_path and self.subtitle_mode == "ass":
+                video_filter = ass_filter(ass_path)
+                # libass only draws on frames that exist, so VFR needs a frame at each cue edge
+                cue_times = [t for (start, end), _ in parse_srt(subtitle_path) for t in (start, end)]
+            # Soft subtitles are muxed during the encode itself
+            subtitle_track = ass_path if self.subtitle_mode == "soft" else None
+            compositor = FrameCompositor(self.width, self.height)
+            
+            if self.output_format == "mp4":
+                temp_output = os.path.join(self.output_dir, "temp_" + output_filename)
+                final_output = os.path.join(self.output_dir, output_filename)
+                frames, composited = compositor.render(audio_path, anchor_images, subtitles, temp_output,
+                                                       video_filter=video_filter, subtitle_track=subtitle_track,
+                                                       vfr=self.vfr, cue_times=cue_times)
+                print(f"  Wrote {frames} frames ({composited} composited)")
+                return self._finish_output(temp_output, final_output, None)
+            
+            # Progressive formats are written in place: no temp file, no final copy
+            if self.output_format == "hls":
+                segment_dir = os.path.join(self.output_dir, os.path.splitext(output_filename)[0])
+                os.makedirs(segment_dir, exist_ok=True)
+                final_output = os.path.join(segment_dir, "index.m3u8")
+            else:
+                final_output = os.path.join(self.output_dir, output_filename)
+            print(f"  Streaming {self.output_format} output to {final_output}")
+            frames, composited = compositor.render(audio_path, anchor_images, subtitles, final_output,
+                                                   video_filter=video_filter, subtitle_track=subtitle_track,
+                                                   output_format=self.output_format, on_segment=self.on_segment,
+                                                   vfr=self.vfr, cue_times=cue_times)
+            print(f"  Wrote {frames} frames ({composited} composited)")
+            return final_output
+            
+        except Exception as e:
+            print(f"Error creating video: {e}")
+            import traceback
+            traceback.print_exc()
+            raise
+
+    def _create_video_moviepy(self, audio_path, anchor_image_path, output_filename, subtitle_path, ass_path=None):
+        """
+        Render with MoviePy: composite the anchor, then burn subtitles in a
+        second pass. Both passes are video-only; the audio is muxed once at
+        the end so it is never decoded or re-encoded by MoviePy.
+        """
+        from moviepy import ColorClip, CompositeVideoClip, VideoFileClip
+
+        try:
+            duration = probe_duration(audio_path)
             
             # Create animated anchor by cycling through images
             # Detect if we have multiple images in assets folder
-            import os
-            import glob
-            
-            # Get all anchor images
-            anchor_dir = os.path.dirname(anchor_image_path)
-            anchor_images = sorted(glob.glob(os.path.join(anchor_dir, "anchor*.png")))
+            anchor_images = find_anchor_images(anchor_image_path)
             
             if len(anchor_images) > 1:
                 print(f"  Found {len(anchor_images)} anchor images - creating animated anchor")
                 # Create animation by cycling through images
                 anchor_clips = []
-                frame_duration = 0.3  # Each image shows for 0.3 seconds
+                frame_duration = ANCHOR_FRAME_DURATION
                 
                 # Load and resize all images
                 resized_images = []
                 for img_path in anchor_images:
-                    img = ImageClip(img_path)
-                    # Resize to fit 1920x1080 while maintaining aspect ratio
-                    img = img.resized(height=self.height)
-                    if img.w > self.width:
-                        img = img.resized(width=self.width)
-                    img = img.with_position("center")
-                    resized_images.append(img)
+                    resized_images.append(load_anchor_clip(img_path, self.width, self.height))
                 
                 # Create cycling animation
                 current_time = 0
@@ -79,17 +763,13 @@ class VideoGenerator:
             else:
                 # Single image - use static anchor
                 print("  Using static anchor image")
-                anchor_img = ImageClip(anchor_image_path).with_duration(duration)
-                anchor_img = anchor_img.resized(height=self.height)
-                if anchor_img.w > self.width:
-                    anchor_img = anchor_img.resized(width=self.width)
-                anchor_img = anchor_img.with_position("center")
-                anchor_clips = [anchor_img]
+                anchor_img = load_anchor_clip(anchor_image_path, self.width, self.height)
+                anchor_clips = [anchor_img.with_duration(duration)]
             
             
             # Create background
             background = ColorClip(size=(self.width, self.height), 
-                                   color=(20, 30, 50), 
+                                   color=BACKGROUND_COLOR, 
                                    duration=duration)
             
             # Composite video - background + animated anchor clips
@@ -98,8 +778,10 @@ class VideoGenerator:
                 *anchor_clips  # Unpack all anchor animation frames
             ])
             
-            # Add audio
-            video = video.with_audio(audio)
+            # In ass mode libass burns the captions during this (only) encode
+            ffmpeg_params = None
+            if ass_path and self.subtitle_mode == "ass":
+                ffmpeg_params = ["-vf", ass_filter(ass_path)]
             
             # Write output
             temp_output = os.path.join(self.output_dir, "temp_" + output_filename)
@@ -108,28 +790,30 @@ class VideoGenerator:
                 temp_output, 
                 fps=24, 
                 codec='libx264',
-                audio_codec='aac',
+                audio=False,
                 threads=4,
                 preset='ultrafast',
+                ffmpeg_params=ffmpeg_params,
                 # logger=None
             )
             
             # Cleanup MoviePy objects
-            audio.close()
             video.close()
             
             final_output = os.path.join(self.output_dir, output_filename)
             
+            if ass_path:
+                return self._finish_output(temp_output, final_output, ass_path, audio_path)
+            
             # 4. Burn subtitles if provided
-            if subtitle_path and os.path.exists(subtitle_path):
+            if subtitle_path:
                 print(f"  Burning subtitles from {subtitle_path}...")
                 try:
                     from moviepy.video.tools.subtitles import SubtitlesClip
                     from moviepy.video.VideoClip import TextClip
                     
                     # Generator function for subtitles
-                    # Use absolute font path for Windows compatibility
-                    font_path = "C:/Windows/Fonts/arial.ttf"
+                    font_path = resolve_font_path()
                     
                     def make_textclip(txt):
                         return TextClip(
@@ -144,37 +828,6 @@ class VideoGenerator:
                             text_align='center'
                         )
                         
-                    # Manual SRT parser to avoid MoviePy parsing issues
-                    def parse_srt(filepath):
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        
-                        subtitles = []
-                        blocks = content.strip().split('\n\n')
-                        
-                        for block in blocks:
-                            lines = block.strip().split('\n')
-                            if len(lines) >= 3:
-                                # Parse timestamp 00:00:00,000 --> 00:00:00,000
-                                times = lines[1].split(' --> ')
-                                if len(times) != 2:
-                                    continue
-                                    
-                                start_str = times[0].replace(',', '.')
-                                end_str = times[1].replace(',', '.')
-                                
-                                def to_seconds(t):
-                                    parts = t.split(':')
-                                    return int(parts[0])*3600 + int(parts[1])*60 + float(parts[2])
-                                
-                                start = to_seconds(start_str)
-                                end = to_seconds(end_str)
-                                
-                                # Parse text (join remaining lines)
-                                text = '\n'.join(lines[2:])
-                                subtitles.append(((start, end), text))
-                        return subtitles
-
                     # Parse subtitles
                     subs_list = parse_srt(subtitle_path)
                     print(f"  Parsed {len(subs_list)} subtitles")
@@ -197,12 +850,13 @@ class VideoGenerator:
                     # Set duration explicitly
                     final_video = final_video.with_duration(video_duration)
                     
-                    # Write final video
+                    # Write final video (still video-only)
+                    subs_output = os.path.join(self.output_dir, "temp_subs_" + output_filename)
                     final_video.write_videofile(
-                        final_output,
+                        subs_output,
                         fps=24,
                         codec='libx264',
-                        audio_codec='aac',
+                        audio=False,
                         threads=4,
                         preset='ultrafast',
                         # logger=None
@@ -217,22 +871,15 @@ class VideoGenerator:
                     if os.path.exists(temp_output):
                         os.remove(temp_output)
                         
-                    return final_output
+                    return self._finish_output(subs_output, final_output, None, audio_path)
                     
                 except Exception as e:
                     print(f"Error burning subtitles with MoviePy: {e}")
-                    # Fallback: Rename temp to final
-                    print("  Renaming temp file to final output (without subtitles)...")
-                    if os.path.exists(final_output):
-                        os.remove(final_output)
-                    os.rename(temp_output, final_output)
-                    return final_output
+                    # Fallback: use the temp render as final output
+                    print("  Using temp render as final output (without subtitles)...")
+                    return self._finish_output(temp_output, final_output, None, audio_path)
             else:
-                # Rename temp to final
-                if os.path.exists(final_output):
-                    os.remove(final_output)
-                os.rename(temp_output, final_output)
-                return final_output
+                return self._finish_output(temp_output, final_output, None, audio_path)
             
         except Exception as e:
             print(f"Error creating video: {e}")
@@ -240,6 +887,42 @@ class VideoGenerator:
             traceback.print_exc()
             raise
 
+def benchmark_engines(anchor_image_path, seconds=10, orientation="landscape", engines=ENGINES + ("numpy-vfr",)):
+    """
+    Render the same synthetic clip (silent audio, a new caption every 1.5 s)
+    with each engine and return {engine: frames per second of output video}.
+    "numpy-vfr" is the NumPy engine with variable-frame-rate output.
+    """
+    import subprocess
+    import tempfile
+    import time
+    
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        audio_path = os.path.join(tmp, "bench.mp3")
+        subprocess.run([ffmpeg_exe(), "-y", "-loglevel", "error", "-f", "lavfi",
+                        "-i", "anullsrc=r=24000:cl=mono", "-t", str(seconds), audio_path], check=True)
+        
+        subtitle_path = os.path.join(tmp, "bench.srt")
+        with open(subtitle_path, "w", encoding="utf-8") as f:
+            t, index = 0.0, 1
+            while t < seconds:
+                end = min(t + 1.5, seconds)
+                start_ts = f"{int(t // 3600):02d}:{int(t % 3600 // 60):02d}:{t % 60:06.3f}".replace(".", ",")
+                end_ts = f"{int(end // 3600):02d}:{int(end % 3600 // 60):02d}:{end % 60:06.3f}".replace(".", ",")
+                f.write(f"{index}\n{start_ts} --> {end_ts}\nBenchmark caption number {index} for the news\n\n")
+                t, index = end, index + 1
+        
+        total_frames = seconds * 24
+        for engine in engines:
+            generator = VideoGenerator(output_dir=tmp, orientation=orientation,
+                                       engine=engine.replace("-vfr", ""), vfr=engine.endswith("-vfr"))
+            started = time.perf_counter()
+            generator.create_video(audio_path, anchor_image_path, "Benchmark",
+                                   output_filename=f"bench_{engine}.mp4", subtitle_path=subtitle_path)
+            results[engine] = total_frames / (time.perf_counter() - started)
+    return results
+
 if __name__ == "__main__":
     # Test - requires audio file and anchor image
     generator = VideoGenerator()